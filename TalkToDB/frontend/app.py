@@ -34,7 +34,7 @@ logger = logging.getLogger("mongodb_ui")
 # Import MongoDB agent system components
 from mongoDBExplorer import MongoDBExplorer
 from DBAgent import MongoDBAgentSystem
-from response_capture import ResponseCapture, patch_agent_system
+from response_capture import ResponseCapture, MongoDBResponseFormatter, patch_agent_system
 
 # Utility function to create a MongoDB explorer
 def get_mongodb_explorer(connection_string: str, db_name: str = None) -> MongoDBExplorer:
@@ -411,6 +411,7 @@ def render_chat_tab():
                 
                 # If the message contains data, display it
                 if message.get("type") == "data" and "data" in message:
+                    MongoDBResponseFormatter.prepare_dataframe(message["data"])
                     with st.expander("View MongoDB Data", expanded=True):
                         st.dataframe(message["data"])
                         
@@ -1,8 +1,11 @@
 import os
 import logging
-from typing import Dict, List, Any, Union, Optional
+import threading
+from typing import Dict, List, Any, Union, Optional, Iterator, Tuple
 from datetime import datetime
 from bson import ObjectId
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
 from pymongo.mongo_client import MongoClient as PyMongoClient
 from pymongo.server_api import ServerApi
 from pymongo.collection import Collection
@@ -29,6 +32,13 @@ class MongoDBClient:
     Provides methods for all common database operations with error handling.
     """
     
+    # Shared PyMongo clients keyed by (connection string, connect timeout), so explorers for
+    # different databases on the same cluster reuse one connection pool. Each entry holds
+    # [client, number of MongoDBClient instances using it]; the client is closed when the
+    # last of them calls close().
+    _client_cache: Dict[Tuple[str, int], list] = {}
+    _client_cache_lock = threading.Lock()
+    
     def __init__(self, database_name: str, connection_string:str, connect_timeout: int = 5000):
         """
         Initialize the MongoDB client with the specified database.
@@ -38,21 +48,39 @@ class MongoDBClient:
             connect_timeout: Connection timeout in milliseconds
         """
         try:
-            # Create a new client and connect to the server with appropriate options
-            self.client = PyMongoClient(
-                connection_string,
-                server_api=ServerApi('1'),
-                connectTimeoutMS=connect_timeout,
-                retryWrites=True,
-                w='majority'
-            )
+            self.connection_string = connection_string
+            self._cache_key = None
+            cache_key = (connection_string, connect_timeout)
+            
+            with self._client_cache_lock:
+                entry = self._client_cache.get(cache_key)
+                
+                if entry is None:
+                    # Create a new client and connect to the server with appropriate options
+                    client = PyMongoClient(
+                        connection_string,
+                        server_api=ServerApi('1'),
+                        connectTimeoutMS=connect_timeout,
+                        retryWrites=True,
+                        w='majority'
+                    )
 
-            # Send a ping to confirm a successful connection
-            self.client.admin.command('ping')
+                    # Send a ping to confirm a successful connection
+                    try:
+                        client.admin.command('ping')
+                    except Exception:
+                        client.close()
+                        raise
+                    entry = self._client_cache[cache_key] = [client, 0]
+                
+                entry[1] += 1
+                self.client = entry[0]
+                self._cache_key = cache_key
+            
             logger.info(f"Successfully connected to MongoDB cluster for database '{database_name}'")
             
             # Get the database
-            self.db = self.client[database_name]
+            self.db = self.client.get_database(database_name)
             
             # Initialize transaction session
             self.session = None
@@ -234,7 +262,8 @@ class MongoDBClient:
                   projection: Dict = None, 
                   sort: List = None, 
                   limit: int = 0, 
-                  skip: int = 0) -> List[Dict]:
+                  skip: int = 0,
+                  batch_size: int = 0) -> List[Dict]:
         """
         Find documents that match the query with pagination.
         
@@ -245,6 +274,7 @@ class MongoDBClient:
             sort: Optional sorting parameters [(field, direction), ...]
             limit: Maximum number of results (0 for all)
             skip: Number of documents to skip
+            batch_size: Documents per server batch (0 for the server default)
             
         Returns:
             List of matching documents
@@ -263,6 +293,9 @@ class MongoDBClient:
                 
             if limit > 0:
                 cursor = cursor.limit(limit)
+                
+            if batch_size > 0:
+                cursor = cursor.batch_size(batch_size)
             
             # Convert ObjectId to string
             result = []
@@ -276,6 +309,93 @@ class MongoDBClient:
             logger.error(f"Failed to find documents: {str(e)}")
             return []
 
+    def iter_many(self, 
+                  collection_name: str, 
+                  query: Dict = None, 
+                  projection: Dict = None, 
+                  sort: List = None, 
+                  limit: int = 0, 
+                  skip: int = 0,
+                  batch_size: int = 0) -> Iterator[Dict]:
+        """
+        Lazily iterate documents that match the query without materializing the result list.
+        
+        Args:
+            collection_name: Name of the collection
+            query: Query filter to apply (None for all documents)
+            projection: Optional fields to include/exclude
+            sort: Optional sorting parameters [(field, direction), ...]
+            limit: Maximum number of results (0 for all)
+            skip: Number of documents to skip
+            batch_size: Documents per server batch (0 for the server default)
+            
+        Yields:
+            Matching documents
+        """
+        if query is None:
+            query = {}
+            
+        try:
+            cursor = self.db[collection_name].find(query, projection)
+            
+            if sort:
+                cursor = cursor.sort(sort)
+            
+            if skip > 0:
+                cursor = cursor.skip(skip)
+                
+            if limit > 0:
+                cursor = cursor.limit(limit)
+                
+            if batch_size > 0:
+                cursor = cursor.batch_size(batch_size)
+            
+            # Convert ObjectId to string
+            for doc in cursor:
+                if '_id' in doc and isinstance(doc['_id'], ObjectId):
+                    doc['_id'] = str(doc['_id'])
+                yield doc
+        except PyMongoError as e:
+            logger.error(f"Failed to iterate documents: {str(e)}")
+
+    def find_raw(self, 
+                 collection_name: str, 
+                 query: Dict = None, 
+                 sort: List = None, 
+                 limit: int = 0) -> List[RawBSONDocument]:
+        """
+        Find documents as undecoded RawBSONDocuments, for callers that only re-serialize them.
+        
+        Args:
+            collection_name: Name of the collection
+            query: Query filter to apply (None for all documents)
+            sort: Optional sorting parameters [(field, direction), ...]
+            limit: Maximum number of results (0 for all)
+            
+        Returns:
+            List of raw BSON documents (fields are decoded lazily on access)
+        """
+        if query is None:
+            query = {}
+            
+        try:
+            collection = self.db.get_collection(
+                collection_name,
+                codec_options=CodecOptions(document_class=RawBSONDocument)
+            )
+            cursor = collection.find(query)
+            
+            if sort:
+                cursor = cursor.sort(sort)
+                
+            if limit > 0:
+                cursor = cursor.limit(limit)
+                
+            return list(cursor)
+        except PyMongoError as e:
+            logger.error(f"Failed to find raw documents: {str(e)}")
+            return []
+
     def count_documents(self, collection_name: str, query: Dict = None) -> int:
         """
         Count documents that match the query.
@@ -296,6 +416,22 @@ class MongoDBClient:
             logger.error(f"Failed to count documents: {str(e)}")
             return 0
 
+    def estimated_document_count(self, collection_name: str) -> int:
+        """
+        Get the total document count from collection metadata without scanning.
+        
+        Args:
+            collection_name: Name of the collection
+            
+        Returns:
+            Estimated count of documents in the collection
+        """
+        try:
+            return self.db[collection_name].estimated_document_count()
+        except PyMongoError as e:
+            logger.error(f"Failed to estimate document count: {str(e)}")
+            return 0
+
     # Document Operations - Update
     def update_one(self, 
                    collection_name: str, 
@@ -506,6 +642,47 @@ class MongoDBClient:
             logger.error(f"Failed to execute aggregation: {str(e)}")
             return []
 
+    def iter_aggregate(self, collection_name: str, pipeline: List[Dict]) -> Iterator[Dict]:
+        """
+        Lazily iterate the results of an aggregation pipeline.
+        
+        Args:
+            collection_name: Name of the collection
+            pipeline: MongoDB aggregation pipeline
+            
+        Yields:
+            Aggregation result documents
+        """
+        try:
+            for doc in self.db[collection_name].aggregate(pipeline):
+                if '_id' in doc and isinstance(doc['_id'], ObjectId):
+                    doc['_id'] = str(doc['_id'])
+                yield doc
+        except PyMongoError as e:
+            logger.error(f"Failed to iterate aggregation: {str(e)}")
+
+    def facet(self, collection_name: str, facets: Dict[str, List[Dict]], query: Dict = None) -> Dict:
+        """
+        Run several sub-pipelines over the same documents in one $facet aggregation.
+        
+        Args:
+            collection_name: Name of the collection
+            facets: Mapping of output name to aggregation stages
+            query: Optional query to filter documents before faceting
+            
+        Returns:
+            Dictionary mapping each facet name to its list of results
+        """
+        pipeline = [{'$match': query}] if query else []
+        pipeline.append({'$facet': facets})
+        
+        try:
+            result = list(self.db[collection_name].aggregate(pipeline))
+            return result[0] if result else {}
+        except PyMongoError as e:
+            logger.error(f"Failed to execute facet aggregation: {str(e)}")
+            return {}
+
     def distinct(self, collection_name: str, field: str, query: Dict = None) -> List:
         """
         Get distinct values for a field across a collection.
@@ -829,9 +1006,23 @@ class MongoDBClient:
             except Exception as e:
                 logger.error(f"Error ending session: {str(e)}")
             
-        if self.client:
+        if self.client and self._cache_key is not None:
             try:
-                self.client.close()
-                logger.info("MongoDB connection closed")
+                # Release this instance's hold on the shared client; only the last
+                # holder closes it and drops it so later instances open a fresh pool
+                with self._client_cache_lock:
+                    cache_key, self._cache_key = self._cache_key, None
+                    entry = self._client_cache.get(cache_key)
+                    if entry is not None and entry[0] is self.client:
+                        entry[1] -= 1
+                        last_holder = entry[1] <= 0
+                        if last_holder:
+                            del self._client_cache[cache_key]
+                    else:
+                        last_holder = True
+                
+                if last_holder:
+                    self.client.close()
+                    logger.info("MongoDB connection closed")
             except Exception as e:
                 logger.error(f"Error closing MongoDB connection: {str(e)}")
\ No newline at end of file
@@ -1,5 +1,5 @@
 import json
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterator, Iterable
 from datetime import datetime
 
 import pandas as pd
@@ -14,6 +14,12 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from mongoConnect import MongoDBClient
 from dbInterface import DatabaseExplorer
 
+# orjson is optional; the stdlib json module is used when it is not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 class MongoDBExplorer(DatabaseExplorer):
     """MongoDB implementation of the DatabaseExplorer interface"""
     
@@ -63,6 +69,16 @@ class MongoDBExplorer(DatabaseExplorer):
         # Get document count
         count = self.db_client.count_documents(collection_name)
         
+        # Empty collections have no samples to fetch or schema to infer
+        if count == 0:
+            return {
+                "count": count,
+                "stats": stats,
+                "schema": {},
+                "indexes": [],
+                "sample_documents": []
+            }
+        
         # Sample documents (up to 5)
         sample_size = min(count, 5)
         sample_docs = self.db_client.find_many(
@@ -90,26 +106,31 @@ class MongoDBExplorer(DatabaseExplorer):
         if not documents:
             return {}
             
-        # Combine all document fields
+        # Combine all document fields in one pass, keeping the first value seen as the sample
         all_fields = {}
         
         for doc in documents:
             for field, value in doc.items():
                 field_type = type(value).__name__
                 
-                if field in all_fields:
+                info = all_fields.get(field)
+                if info is not None:
                     # Handle type variations
-                    if field_type not in all_fields[field]["types"]:
-                        all_fields[field]["types"].append(field_type)
-                else:
-                    all_fields[field] = {
-                        "types": [field_type],
-                        "sample": str(value)[:100] + ("..." if len(str(value)) > 100 else "")
-                    }
-                    
-                    # Check if field might be a reference to another collection
-                    if field.endswith("Id") or field == "_id":
-                        all_fields[field]["possible_reference"] = True
+                    if field_type not in info["types"]:
+                        info["types"].append(field_type)
+                    continue
+                
+                sample = str(value)
+                info = all_fields[field] = {
+                    "types": [field_type],
+                    "sample": sample[:100] + ("..." if len(sample) > 100 else "")
+                }
+                
+                # Check if field might be a reference to another collection
+                if field.endswith("Id") or field == "_id":
+                    info["possible_reference"] = True
+                    # Cache the collection name a field like "userId" would point to ("users")
+                    info["ref_collection"] = field[:-2] + "s" if field != "_id" else None
         
         return all_fields
     
@@ -119,27 +140,23 @@ class MongoDBExplorer(DatabaseExplorer):
         
         # Look for foreign key patterns
         for collection_name, collection_info in collections_info.items():
-            schema = collection_info.get("schema", {})
+            schema_items = collection_info.get("schema", {}).items()
             
-            for field, field_info in schema.items():
-                # Check if field looks like a reference (ends with "Id" or is "_id")
-                if field.endswith("Id") or field == "_id":
-                    # Look for collections that might be referenced
-                    for other_collection in collections_info.keys():
-                        # Skip self-references
-                        if other_collection == collection_name:
-                            continue
-                            
-                        # If field is like "userId" and there's a "users" collection
-                        potential_collection = field[:-2] + "s"  # Convert "userId" to "users"
-                        if potential_collection == other_collection or field == "_id":
-                            relationships.append({
-                                "from_collection": collection_name,
-                                "from_field": field,
-                                "to_collection": other_collection,
-                                "to_field": "_id",
-                                "confidence": "high" if field != "_id" else "medium"
-                            })
+            for field, field_info in schema_items:
+                # Check if field was tagged as a reference during schema inference
+                if field_info.get("possible_reference"):
+                    # If field is like "userId" and there's a "users" collection
+                    potential_collection = field_info.get("ref_collection")
+                    
+                    # Direct lookup instead of scanning every other collection; skip self-references
+                    if potential_collection in collections_info and potential_collection != collection_name:
+                        relationships.append({
+                            "from_collection": collection_name,
+                            "from_field": field,
+                            "to_collection": potential_collection,
+                            "to_field": "_id",
+                            "confidence": "high"
+                        })
                             
                 # Also check if there are fields that look like arrays of refs
                 if "types" in field_info and "list" in field_info["types"]:
@@ -213,6 +230,55 @@ class MongoDBExplorer(DatabaseExplorer):
             
         return df
     
+    def execute_query_chunked(self, collection_name: str, query_params: Dict,
+                              chunk_size: int = 10_000) -> Iterator[pd.DataFrame]:
+        """Execute a MongoDB query and yield results as DataFrames of at most chunk_size rows
+        
+        Args:
+            collection_name: Name of the collection
+            query_params: Same query parameters as execute_query
+            chunk_size: Maximum number of documents per DataFrame
+            
+        Returns:
+            Iterator of pandas.DataFrame chunks; use pd.concat(list(...)) for a single frame
+        """
+        docs = self.db_client.iter_many(
+            collection_name,
+            query=query_params.get("query", {}),
+            projection=query_params.get("projection"),
+            sort=query_params.get("sort"),
+            limit=query_params.get("limit", 100)
+        )
+        return self._chunk_frames(docs, chunk_size)
+    
+    def execute_aggregation_chunked(self, collection_name: str, pipeline: List[Dict],
+                                    chunk_size: int = 10_000) -> Iterator[pd.DataFrame]:
+        """Execute a MongoDB aggregation pipeline and yield results as DataFrames of at most chunk_size rows
+        
+        Args:
+            collection_name: Name of the collection
+            pipeline: MongoDB aggregation pipeline
+            chunk_size: Maximum number of documents per DataFrame
+            
+        Returns:
+            Iterator of pandas.DataFrame chunks; use pd.concat(list(...)) for a single frame
+        """
+        docs = self.db_client.iter_aggregate(collection_name, pipeline)
+        return self._chunk_frames(docs, chunk_size)
+    
+    @staticmethod
+    def _chunk_frames(docs: Iterable[Dict], chunk_size: int) -> Iterator[pd.DataFrame]:
+        """Buffer documents from a cursor and yield them chunk_size at a time as DataFrames"""
+        buffer = []
+        for doc in docs:
+            buffer.append(doc)
+            if len(buffer) >= chunk_size:
+                yield pd.DataFrame.from_records(buffer)
+                buffer = []
+        
+        if buffer:
+            yield pd.DataFrame.from_records(buffer)
+    
     def generate_notes(self) -> str:
         """Generate readable notes from MongoDB exploration results"""
         notes = []
@@ -225,6 +291,7 @@ class MongoDBExplorer(DatabaseExplorer):
         notes.append(f"## MongoDB Database: {self.exploration_notes['database_name']}")
         notes.append(f"Explored on: {self.exploration_notes['timestamp']}")
         notes.append(f"Found {len(self.exploration_notes['collections'])} collections")
+        notes.append("Every collection uses `_id` as its primary key; references below point to it.")
         notes.append("")
         
         # Collections summary
@@ -258,7 +325,16 @@ class MongoDBExplorer(DatabaseExplorer):
             notes.append("#### Sample Document")
             if collection_info['sample_documents']:
                 sample_doc = collection_info['sample_documents'][0]
-                sample_str = json.dumps(sample_doc, indent=2, default=str)
+                # Both paths hand datetimes to default=str and keep non-ASCII text as is,
+                # so the notes read the same whether or not orjson is installed
+                if orjson is not None:
+                    sample_str = orjson.dumps(
+                        sample_doc,
+                        option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+                        default=str
+                    ).decode()
+                else:
+                    sample_str = json.dumps(sample_doc, indent=2, default=str, ensure_ascii=False)
                 # Truncate if too long
                 if len(sample_str) > 500:
                     sample_str = sample_str[:500] + "..."
@@ -267,6 +343,19 @@ class MongoDBExplorer(DatabaseExplorer):
         
         return "\n".join(notes)
     
+    def one_shot_status(self) -> Dict:
+        """Get connection status and database size information from a single dbStats command"""
+        stats = self.db_client.get_database_stats()
+        
+        return {
+            "ok": bool(stats.get("ok")),
+            "db": stats.get("db", self.db_client.db.name),
+            "collections": stats.get("collections", "unknown"),
+            "objects": stats.get("objects", "unknown"),
+            "storageSize": stats.get("storageSize", "unknown"),
+            "indexes": stats.get("indexes", "unknown")
+        }
+    
     # MongoDB-specific helper methods
     def get_collection_data(self, collection_name: str, query: Dict = None, 
                           limit: int = 100, sort = None) -> List[Dict]:
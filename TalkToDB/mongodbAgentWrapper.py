@@ -6,19 +6,33 @@ proper function execution within the Autogen framework.
 """
 
 import os
+import re
+import ast
 import json
+import time
 import logging
+from types import MappingProxyType
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 import inspect
 import functools
+from functools import lru_cache
 
-import autogen
-from autogen import Agent, UserProxyAgent, AssistantAgent, GroupChat, GroupChatManager
+import bson
 from bson import json_util
+from pymongo.errors import PyMongoError
 
 from mongoDBExplorer import MongoDBExplorer
 
+# orjson is optional; the stdlib json module is used when it is not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Parses the JSON strings agents pass for queries, sorts, projections and pipelines
+_json_loads = orjson.loads if orjson is not None else json.loads
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -26,6 +40,133 @@ logging.basicConfig(
 )
 logger = logging.getLogger('mongodb_wrapper')
 
+# json_util relies on the C BSON extension for fast ObjectId/datetime encoding
+if not bson.has_c():
+    logger.warning("bson C extension not available; BSON encoding will fall back to pure Python")
+
+# Errors the wrapper functions anticipate and report back to the agents as text
+_EXPECTED_ERRORS = (PyMongoError, ValueError, TypeError, KeyError)
+
+def _guard(error_prefix: str, reply_prefix: str = None):
+    """Log anticipated errors from a wrapper function and return them as the function's reply"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            except _EXPECTED_ERRORS as e:
+                logger.error("%s: %s", error_prefix, e)
+                return f"{reply_prefix or error_prefix}: {str(e)}"
+        return wrapper
+    return decorator
+
+# Seconds before the cached collection name set is refreshed from MongoDB
+COLLECTIONS_CACHE_TTL = 30
+
+# Seconds exploration results and notes are reused before re-walking the database
+EXPLORATION_CACHE_TTL = 300
+
+# (connection string, database name) -> {"ts", "results", "summary", "notes"}, shared across
+# wrappers; the raw results, explore summary and notes are stored and expire together
+_exploration_cache = {}
+
+# Wrapper methods exposed to agent code, bound into plain callables by _register_functions
+AGENT_FUNCTION_NAMES = (
+    "explore_mongodb",
+    "get_exploration_notes",
+    "execute_query",
+    "execute_aggregation",
+    "get_collection_sample",
+    "count_documents",
+    "get_distinct_values",
+    "get_field_summaries",
+    "get_connection_status",
+    "create_visualization",
+)
+
+# Number of result rows shown to the agents for queries and aggregations
+DISPLAY_ROWS = 10
+
+def _format_rows(docs: List[Dict], max_colwidth: int = 30) -> str:
+    """Format documents as an aligned text table without building a DataFrame"""
+    columns = list(dict.fromkeys(key for doc in docs for key in doc))
+    
+    def cell(value) -> str:
+        text = str(value)
+        return text if len(text) <= max_colwidth else text[:max_colwidth - 3] + "..."
+    
+    rows = [[""] + columns]
+    rows.extend([str(i)] + [cell(doc.get(col, "NaN")) for col in columns] for i, doc in enumerate(docs))
+    widths = [max(len(row[j]) for row in rows) for j in range(len(rows[0]))]
+    
+    return "\n".join("  ".join(value.rjust(width) for value, width in zip(row, widths)) for row in rows)
+
+def _distinct_stages(field: str, limit: int) -> List[Dict]:
+    """Aggregation stages listing up to limit distinct values of a field, like distinct()
+    
+    Array fields are unwound into their elements; documents where the field is null,
+    missing or an empty array are kept and grouped under null rather than dropped.
+    """
+    return [
+        {"$unwind": {"path": f"${field}", "preserveNullAndEmptyArrays": True}},
+        {"$group": {"_id": f"${field}"}},
+        {"$limit": limit}
+    ]
+
+@lru_cache(maxsize=256)
+def _compile_code(code: str):
+    """Compile an agent code snippet once and reuse the code object for repeats"""
+    return compile(code, '<agent-exec>', 'exec')
+
+# The snippet shape the agents emit almost every turn: `result = fn(<literals>)` then `print(result)`
+_SIMPLE_SNIPPET_RE = re.compile(r'^\s*result\s*=\s*(\w+)\((.*)\)\s*\n\s*print\(result\)\s*$', re.S)
+
+# MongoDB functions registered by the most recent MongoDBAgentWrapper
+_agent_functions = {}
+
+def _run_simple_snippet(code: str):
+    """Call a registered function directly for simple snippets, skipping compile and exec
+    
+    Returns:
+        True if the snippet was handled, False if it needs the generic exec path
+    """
+    match = _SIMPLE_SNIPPET_RE.match(code)
+    if not match or match.group(1) not in _agent_functions:
+        return False
+    
+    try:
+        call = ast.parse(f"f({match.group(2)})", mode='eval').body
+        # The greedy match can span expressions like `fn(a) + fn(b)` or `fn(a).upper()`;
+        # only a single plain call of the wrapper function is safe to short-circuit
+        if not (isinstance(call, ast.Call) and isinstance(call.func, ast.Name) and call.func.id == "f"):
+            return False
+        if any(keyword.arg is None for keyword in call.keywords):
+            return False
+        args = [ast.literal_eval(arg) for arg in call.args]
+        kwargs = {keyword.arg: ast.literal_eval(keyword.value) for keyword in call.keywords}
+    except (SyntaxError, ValueError, TypeError, AttributeError):
+        # Non-literal arguments (names, expressions) go through exec
+        return False
+    
+    print(_agent_functions[match.group(1)](*args, **kwargs))
+    return True
+
+def execute_code(code):
+    """Execute agent code with access to the MongoDB functions registered in this module's globals"""
+    try:
+        if _run_simple_snippet(code):
+            return "Code executed successfully."
+        
+        exec_locals = {}
+        exec(_compile_code(code), globals(), exec_locals)
+        
+        # Return any result
+        if '_result' in exec_locals:
+            return exec_locals['_result']
+        return "Code executed successfully."
+    except Exception as e:
+        return f"Error executing code: {str(e)}"
+
 class MongoDBAgentWrapper:
     """Wrapper around MongoDB agents to ensure proper function execution"""
     
@@ -33,383 +174,379 @@ class MongoDBAgentWrapper:
         """Initialize with a MongoDB explorer"""
         self.db_explorer = db_explorer
         self.functions = {}
+        self._collections_cache = None
+        self._collections_cache_ts = 0
         self._register_functions()
     
     def _register_functions(self):
         """Register all MongoDB functions"""
-        self.functions = {
-            "explore_mongodb": self.explore_mongodb,
-            "get_exploration_notes": self.get_exploration_notes,
-            "execute_query": self.execute_query,
-            "execute_aggregation": self.execute_aggregation,
-            "get_collection_sample": self.get_collection_sample,
-            "count_documents": self.count_documents,
-            "get_distinct_values": self.get_distinct_values,
-            "get_connection_status": self.get_connection_status,
-            "create_visualization": self.create_visualization
-        }
+        self.functions = MappingProxyType({
+            name: functools.partial(getattr(type(self), name), self)
+            for name in AGENT_FUNCTION_NAMES
+        })
         
-        # Register functions in the global scope for code execution
-        for name, func in self.functions.items():
-            globals()[name] = func
+        # Register functions in the global scope for code execution, once per wrapper
+        globals().update(self.functions)
+        _agent_functions.clear()
+        _agent_functions.update(self.functions)
+    
+    def _collection_exists(self, collection_name: str) -> bool:
+        """Check a collection name against a TTL-cached set of collection names"""
+        now = time.monotonic()
+        if self._collections_cache is None or now - self._collections_cache_ts > COLLECTIONS_CACHE_TTL:
+            self._collections_cache = set(self.db_explorer.db_client.list_collections())
+            self._collections_cache_ts = now
+        return collection_name in self._collections_cache
+    
+    def _exploration_key(self) -> tuple:
+        """Key exploration results by cluster as well as database name"""
+        db_client = self.db_explorer.db_client
+        return (db_client.connection_string, db_client.db.name)
+    
+    def _get_cached_exploration(self) -> Optional[Dict[str, Any]]:
+        """Return the cached exploration entry for this database if it is still fresh"""
+        entry = _exploration_cache.get(self._exploration_key())
+        if entry and time.monotonic() - entry["ts"] < EXPLORATION_CACHE_TTL:
+            return entry
+        return None
+    
+    def invalidate_schema_cache(self):
+        """Drop cached exploration results and collection names, e.g. after the schema changes"""
+        _exploration_cache.pop(self._exploration_key(), None)
+        self._collections_cache = None
     
+    @_guard("Error exploring MongoDB database")
     def explore_mongodb(self) -> str:
         """Explore the MongoDB database and return notes"""
-        try:
-            logger.info("Executing explore_mongodb function")
-            exploration_results = self.db_explorer.explore_database()
-            
-            # Get the number of collections from the results
-            collection_count = len(exploration_results.get("collections", {}))
-            
-            collection_info = []
-            for coll_name, coll_data in exploration_results.get("collections", {}).items():
-                doc_count = coll_data.get("count", 0)
-                collection_info.append(f"- {coll_name}: {doc_count} documents")
-            
-            summary = "\n".join(collection_info)
-            result = f"MongoDB exploration completed. Found {collection_count} collections:\n{summary}"
-            logger.info(f"explore_mongodb result: {result[:100]}...")
-            return result
-        except Exception as e:
-            error_msg = f"Error exploring MongoDB database: {str(e)}"
-            logger.error(error_msg)
-            return error_msg
+        logger.info("Executing explore_mongodb function")
+        cached = self._get_cached_exploration()
+        if cached is not None:
+            # Give this explorer the cached results so its notes are available too
+            self.db_explorer.exploration_notes = cached["results"]
+            return cached["summary"]
+        
+        exploration_results = self.db_explorer.explore_database()
+        
+        # Get the number of collections from the results
+        collection_count = len(exploration_results.get("collections", {}))
+        
+        collection_info = []
+        for coll_name, coll_data in exploration_results.get("collections", {}).items():
+            doc_count = coll_data.get("count", 0)
+            collection_info.append(f"- {coll_name}: {doc_count} documents")
+        
+        summary = "\n".join(collection_info)
+        result = f"MongoDB exploration completed. Found {collection_count} collections:\n{summary}"
+        logger.info("explore_mongodb result: %.100s...", result)
+        _exploration_cache[self._exploration_key()] = {
+            "ts": time.monotonic(),
+            "results": exploration_results,
+            "summary": result,
+            "notes": None,
+        }
+        return result
     
+    @_guard("Error getting exploration notes")
     def get_exploration_notes(self) -> str:
         """Get the MongoDB exploration notes"""
-        try:
-            logger.info("Executing get_exploration_notes function")
-            notes = self.db_explorer.generate_notes()
-            if not notes:
-                return "MongoDB database has not been explored yet. Call explore_mongodb() first."
-            
-            logger.info(f"Returning exploration notes: {notes[:100]}...")
-            return notes
-        except Exception as e:
-            error_msg = f"Error getting exploration notes: {str(e)}"
-            logger.error(error_msg)
-            return error_msg
+        logger.info("Executing get_exploration_notes function")
+        cached = self._get_cached_exploration()
+        if cached is not None:
+            if cached["notes"] is not None:
+                return cached["notes"]
+            if not self.db_explorer.exploration_notes:
+                self.db_explorer.exploration_notes = cached["results"]
+        
+        notes = self.db_explorer.generate_notes()
+        if not notes:
+            return "MongoDB database has not been explored yet. Call explore_mongodb() first."
+        
+        # Only cache notes generated from the cached exploration itself
+        if cached is not None and self.db_explorer.exploration_notes is cached["results"]:
+            cached["notes"] = notes
+        
+        logger.info("Returning exploration notes: %.100s...", notes)
+        return notes
     
+    @_guard("Error executing MongoDB query")
     def execute_query(self, collection_name: str, query: Any = None, 
                      limit: int = 100, sort = None, projection = None) -> str:
         """Execute a MongoDB query and return results"""
-        try:
-            logger.info(f"Executing query on collection: {collection_name}")
-            
-            # Check collection exists
-            collections = self.db_explorer.db_client.list_collections()
-            if collection_name not in collections:
-                return f"Error: Collection '{collection_name}' does not exist in the database."
-            
-            # Convert string representation of query to dict if needed
-            if isinstance(query, str):
-                try:
-                    query = json.loads(query)
-                except json.JSONDecodeError:
-                    return "Error: Invalid query JSON format. The query could not be parsed."
-            
-            # Handle None/empty query
-            if query is None:
-                query = {}
-            
-            # Convert string representation of sort to list if needed
-            if isinstance(sort, str):
-                try:
-                    sort = json.loads(sort)
-                except json.JSONDecodeError:
-                    return "Error: Invalid sort JSON format. The sort specification could not be parsed."
-            
-            # Convert projection if needed
-            if isinstance(projection, str):
-                try:
-                    projection = json.loads(projection)
-                except json.JSONDecodeError:
-                    return "Error: Invalid projection JSON format."
-            
-            # Build query params
-            query_params = {
-                "query": query,
-                "limit": limit,
-                "sort": sort,
-                "projection": projection
-            }
-            
-            # Execute the query
-            df = self.db_explorer.execute_query(collection_name, query_params)
-            
-            # Return results
-            if df.empty:
-                return "Query returned no results."
-            
-            # Format the results
-            results_str = f"Query returned {len(df)} documents.\n"
-            
-            # Handle ObjectId and other MongoDB-specific types for display
-            import pandas as pd
-            pd.set_option('display.max_colwidth', 30)
-            
-            # Format the DataFrame for display
-            results_str += df.head(10).to_string()
+        logger.info("Executing query on collection: %s", collection_name)
+        
+        # Check collection exists
+        if not self._collection_exists(collection_name):
+            return f"Error: Collection '{collection_name}' does not exist in the database."
+        
+        # Convert string representation of query to dict if needed
+        if isinstance(query, str):
+            try:
+                query = _json_loads(query)
+            except json.JSONDecodeError:
+                return "Error: Invalid query JSON format. The query could not be parsed."
+        
+        # Handle None/empty query
+        if query is None:
+            query = {}
+        
+        # Convert string representation of sort to list if needed
+        if isinstance(sort, str):
+            try:
+                sort = _json_loads(sort)
+            except json.JSONDecodeError:
+                return "Error: Invalid sort JSON format. The sort specification could not be parsed."
+        
+        # Convert projection if needed
+        if isinstance(projection, str):
+            try:
+                projection = _json_loads(projection)
+            except json.JSONDecodeError:
+                return "Error: Invalid projection JSON format."
+        
+        # Leave out _id unless the caller asked for specific fields
+        if projection is None:
+            projection = {"_id": 0}
+        
+        db_client = self.db_explorer.db_client
+        display_limit = min(limit, DISPLAY_ROWS) if limit > 0 else DISPLAY_ROWS
+        
+        # Only the displayed rows are fetched; the total comes from a count
+        display_docs = db_client.find_many(
+            collection_name,
+            query=query,
+            projection=projection,
+            sort=sort,
+            limit=display_limit,
+            batch_size=display_limit
+        )
+        
+        # Return results
+        if not display_docs:
+            return "Query returned no results."
+        
+        total = len(display_docs)
+        if total == DISPLAY_ROWS:
+            total = db_client.count_documents(collection_name, query)
+            if limit > 0:
+                total = min(total, limit)
+        
+        # Format the results
+        results_str = f"Query returned {total} documents.\n"
+        results_str += _format_rows(display_docs)
+        
+        if total > DISPLAY_ROWS:
+            results_str += f"\n... and {total - DISPLAY_ROWS} more documents"
             
-            if len(df) > 10:
-                results_str += f"\n... and {len(df) - 10} more documents"
-                
-            return results_str
-        except Exception as e:
-            error_msg = f"Error executing MongoDB query: {str(e)}"
-            logger.error(error_msg)
-            return error_msg
+        return results_str
     
+    @_guard("Error executing MongoDB aggregation")
     def execute_aggregation(self, collection_name: str, aggregation_pipeline: Any) -> str:
         """Execute a MongoDB aggregation pipeline and return results"""
-        try:
-            logger.info(f"Executing aggregation on collection: {collection_name}")
-            
-            # Check collection exists
-            collections = self.db_explorer.db_client.list_collections()
-            if collection_name not in collections:
-                return f"Error: Collection '{collection_name}' does not exist in the database."
-            
-            # Convert string representation to appropriate format if needed
-            if isinstance(aggregation_pipeline, str):
-                try:
-                    aggregation_pipeline = json.loads(aggregation_pipeline)
-                except json.JSONDecodeError:
-                    return "Error: Invalid aggregation pipeline JSON format."
-            
-            # Execute the aggregation
-            df = self.db_explorer.execute_aggregation(collection_name, aggregation_pipeline)
-            
-            # Return results
-            if df.empty:
-                return "Aggregation returned no results."
-            
-            # Format the results
-            results_str = f"Aggregation returned {len(df)} documents.\n"
-            
-            # Format the DataFrame for display
-            import pandas as pd
-            pd.set_option('display.max_colwidth', 30)
-            results_str += df.head(10).to_string()
+        logger.info("Executing aggregation on collection: %s", collection_name)
+        
+        # Check collection exists
+        if not self._collection_exists(collection_name):
+            return f"Error: Collection '{collection_name}' does not exist in the database."
+        
+        # Convert string representation to appropriate format if needed
+        if isinstance(aggregation_pipeline, str):
+            try:
+                aggregation_pipeline = _json_loads(aggregation_pipeline)
+            except json.JSONDecodeError:
+                return "Error: Invalid aggregation pipeline JSON format."
+        
+        # Stream the results, keeping only the displayed rows
+        display_docs = []
+        total = 0
+        for doc in self.db_explorer.db_client.iter_aggregate(collection_name, aggregation_pipeline):
+            if total < DISPLAY_ROWS:
+                display_docs.append(doc)
+            total += 1
+        
+        # Return results
+        if not display_docs:
+            return "Aggregation returned no results."
+        
+        # Format the results
+        results_str = f"Aggregation returned {total} documents.\n"
+        results_str += _format_rows(display_docs)
+        
+        if total > DISPLAY_ROWS:
+            results_str += f"\n... and {total - DISPLAY_ROWS} more documents"
             
-            if len(df) > 10:
-                results_str += f"\n... and {len(df) - 10} more documents"
-                
-            return results_str
-        except Exception as e:
-            error_msg = f"Error executing MongoDB aggregation: {str(e)}"
-            logger.error(error_msg)
-            return error_msg
+        return results_str
     
+    @_guard("Error retrieving collection sample")
     def get_collection_sample(self, collection_name: str, count: int = 5) -> str:
         """Get a sample of documents from a collection"""
-        try:
-            logger.info(f"Getting sample from collection: {collection_name}")
-            
-            # Check collection exists
-            collections = self.db_explorer.db_client.list_collections()
-            if collection_name not in collections:
-                return f"Error: Collection '{collection_name}' does not exist in the database."
-            
-            # Get sample documents
-            samples = self.db_explorer.db_client.find_many(
-                collection_name, 
-                limit=count,
-                sort=[("_id", 1)]
-            )
-            
-            if not samples:
-                return f"No documents found in collection '{collection_name}'."
-            
-            # Format samples as readable JSON
-            sample_json = json.dumps(samples, indent=2, default=json_util.default)
-            
-            return f"Sample of {len(samples)} documents from '{collection_name}':\n{sample_json}"
-        except Exception as e:
-            error_msg = f"Error retrieving collection sample: {str(e)}"
-            logger.error(error_msg)
-            return error_msg
+        logger.info("Getting sample from collection: %s", collection_name)
+        
+        # Check collection exists
+        if not self._collection_exists(collection_name):
+            return f"Error: Collection '{collection_name}' does not exist in the database."
+        
+        # Get sample documents as raw BSON; they are only serialized back to JSON
+        samples = self.db_explorer.db_client.find_raw(
+            collection_name, 
+            limit=count,
+            sort=[("_id", 1)]
+        )
+        
+        if not samples:
+            return f"No documents found in collection '{collection_name}'."
+        
+        # Format samples as readable JSON
+        sample_json = json_util.dumps(samples, indent=2, json_options=json_util.RELAXED_JSON_OPTIONS)
+        
+        return f"Sample of {len(samples)} documents from '{collection_name}':\n{sample_json}"
     
+    @_guard("Error counting documents")
     def count_documents(self, collection_name: str, query: Any = None) -> str:
         """Count documents in a collection, optionally filtered by a query"""
-        try:
-            logger.info(f"Counting documents in collection: {collection_name}")
-            
-            # Check collection exists
-            collections = self.db_explorer.db_client.list_collections()
-            if collection_name not in collections:
-                return f"Error: Collection '{collection_name}' does not exist in the database."
-            
-            # Convert string representation of query to dict if needed
-            if isinstance(query, str):
-                try:
-                    query = json.loads(query)
-                except json.JSONDecodeError:
-                    return "Error: Invalid query JSON format"
-            
-            # Handle None query
-            if query is None:
-                query = {}
-                
-            # Count documents
-            count = self.db_explorer.db_client.count_documents(collection_name, query)
+        logger.info("Counting documents in collection: %s", collection_name)
+        
+        # Check collection exists
+        if not self._collection_exists(collection_name):
+            return f"Error: Collection '{collection_name}' does not exist in the database."
+        
+        # Convert string representation of query to dict if needed
+        if isinstance(query, str):
+            try:
+                query = _json_loads(query)
+            except json.JSONDecodeError:
+                return "Error: Invalid query JSON format"
+        
+        # Unfiltered counts come from collection metadata instead of a scan
+        if not query:
+            count = self.db_explorer.db_client.estimated_document_count(collection_name)
+            return f"Collection '{collection_name}' contains {count} documents."
             
-            # Return formatted result
-            filter_str = "" if not query or query == {} else f" matching query {json.dumps(query)}"
-            return f"Collection '{collection_name}' contains {count} documents{filter_str}."
-        except Exception as e:
-            error_msg = f"Error counting documents: {str(e)}"
-            logger.error(error_msg)
-            return error_msg
+        # Count documents
+        count = self.db_explorer.db_client.count_documents(collection_name, query)
+        
+        # Return formatted result
+        return f"Collection '{collection_name}' contains {count} documents matching query {json.dumps(query)}."
     
+    @_guard("Error getting distinct values")
     def get_distinct_values(self, collection_name: str, field: str, query: Any = None) -> str:
         """Get distinct values for a field in a collection"""
-        try:
-            logger.info(f"Getting distinct values for field '{field}' in collection: {collection_name}")
-            
-            # Check collection exists
-            collections = self.db_explorer.db_client.list_collections()
-            if collection_name not in collections:
-                return f"Error: Collection '{collection_name}' does not exist in the database."
-            
-            # Convert string representation of query to dict if needed
-            if isinstance(query, str):
-                try:
-                    query = json.loads(query)
-                except json.JSONDecodeError:
-                    return "Error: Invalid query JSON format"
-            
-            # Handle None query
-            if query is None:
-                query = {}
-                
-            # Get distinct values
-            values = self.db_explorer.db_client.distinct(collection_name, field, query)
-            
-            # Format output
-            if not values:
-                return f"No distinct values found for field '{field}' in collection '{collection_name}'."
-            
-            # Limit number of displayed values if too many
-            display_limit = 50
-            display_values = values[:display_limit]
-            additional_count = len(values) - display_limit if len(values) > display_limit else 0
-            
-            # Format values as string
-            values_str = json.dumps(display_values, default=json_util.default)
-            
-            result = f"Found {len(values)} distinct values for field '{field}' in collection '{collection_name}'.\n"
-            result += f"Values: {values_str}"
+        logger.info("Getting distinct values for field '%s' in collection: %s", field, collection_name)
+        
+        # Check collection exists
+        if not self._collection_exists(collection_name):
+            return f"Error: Collection '{collection_name}' does not exist in the database."
+        
+        # Convert string representation of query to dict if needed
+        if isinstance(query, str):
+            try:
+                query = _json_loads(query)
+            except json.JSONDecodeError:
+                return "Error: Invalid query JSON format"
+        
+        # Handle None query
+        if query is None:
+            query = {}
+            
+        # Let the server stop after one value past the display limit instead of
+        # shipping every distinct value
+        display_limit = 50
+        pipeline = _distinct_stages(field, display_limit + 1)
+        if query:
+            pipeline.insert(0, {"$match": query})
+        
+        values = [doc["_id"] for doc in self.db_explorer.db_client.aggregate(collection_name, pipeline)]
+        
+        # Format output
+        if not values:
+            return f"No distinct values found for field '{field}' in collection '{collection_name}'."
+        
+        has_more = len(values) > display_limit
+        
+        # Format values as string
+        values_str = json.dumps(values[:display_limit], default=json_util.default)
+        
+        count_str = f"more than {display_limit}" if has_more else str(len(values))
+        result = f"Found {count_str} distinct values for field '{field}' in collection '{collection_name}'.\n"
+        result += f"Values: {values_str}"
+        
+        if has_more:
+            result += "\n... and more values"
             
-            if additional_count > 0:
-                result += f"\n... and {additional_count} more values"
-                
-            return result
-        except Exception as e:
-            error_msg = f"Error getting distinct values: {str(e)}"
-            logger.error(error_msg)
-            return error_msg
+        return result
     
+    @_guard("Error getting field summaries")
+    def get_field_summaries(self, collection_name: str, fields: Any, query: Any = None) -> str:
+        """Get the document count and distinct values for several fields in a single $facet roundtrip"""
+        logger.info("Getting field summaries for %s in collection: %s", fields, collection_name)
+        
+        # Check collection exists
+        if not self._collection_exists(collection_name):
+            return f"Error: Collection '{collection_name}' does not exist in the database."
+        
+        # Accept a JSON list or a comma-separated string of field names
+        if isinstance(fields, str):
+            try:
+                fields = _json_loads(fields)
+            except json.JSONDecodeError:
+                fields = [f.strip() for f in fields.split(",") if f.strip()]
+        
+        # Convert string representation of query to dict if needed
+        if isinstance(query, str):
+            try:
+                query = _json_loads(query)
+            except json.JSONDecodeError:
+                return "Error: Invalid query JSON format"
+        
+        # One facet for the count and one per field for its distinct values
+        display_limit = 50
+        facets = {"count": [{"$count": "n"}]}
+        for i, field in enumerate(fields):
+            facets[f"field_{i}"] = _distinct_stages(field, display_limit + 1)
+        
+        results = self.db_explorer.db_client.facet(collection_name, facets, query)
+        
+        count_result = results.get("count", [])
+        count = count_result[0]["n"] if count_result else 0
+        
+        filter_str = "" if not query else f" matching query {json.dumps(query)}"
+        lines = [f"Collection '{collection_name}' contains {count} documents{filter_str}."]
+        
+        for i, field in enumerate(fields):
+            values = [doc["_id"] for doc in results.get(f"field_{i}", [])]
+            more = "+" if len(values) > display_limit else ""
+            values_str = json.dumps(values[:display_limit], default=json_util.default)
+            lines.append(f"Field '{field}': {min(len(values), display_limit)}{more} distinct values: {values_str}")
+        
+        return "\n".join(lines)
+    
+    @_guard("Error checking connection status", reply_prefix="❌ MongoDB connection error")
     def get_connection_status(self) -> str:
         """Check MongoDB connection status"""
-        try:
-            logger.info("Checking MongoDB connection status")
-            
-            # Test the connection
-            is_connected = self.db_explorer.db_client.ping()
-            
-            if is_connected:
-                # Get database stats
-                stats = self.db_explorer.db_client.get_database_stats()
-                
-                db_name = self.db_explorer.db_client.db.name
-                collections = len(self.db_explorer.db_client.list_collections())
-                
-                return (
-                    f"✅ Connected to MongoDB database: {db_name}\n"
-                    f"Collections: {collections}\n"
-                    f"Storage size: {stats.get('storageSize', 'unknown')} bytes\n"
-                    f"Objects: {stats.get('objects', 'unknown')}\n"
-                    f"Indexes: {stats.get('indexes', 'unknown')}"
-                )
-            else:
-                return "❌ Not connected to MongoDB. Check connection parameters."
-        except Exception as e:
-            error_msg = f"Error checking connection status: {str(e)}"
-            logger.error(error_msg)
-            return f"❌ MongoDB connection error: {str(e)}"
+        logger.info("Checking MongoDB connection status")
+        
+        # One dbStats roundtrip answers both "are we connected" and the size figures
+        status = self.db_explorer.one_shot_status()
+        
+        if status["ok"]:
+            return (
+                f"✅ Connected to MongoDB database: {status['db']}\n"
+                f"Collections: {status['collections']}\n"
+                f"Storage size: {status['storageSize']} bytes\n"
+                f"Objects: {status['objects']}\n"
+                f"Indexes: {status['indexes']}"
+            )
+        else:
+            return "❌ Not connected to MongoDB. Check connection parameters."
     
     def create_visualization(self, collection_name: str, viz_type: str, 
                            query: Any = None, params: Dict = None, 
                            output_path: str = None, 
                            aggregation_pipeline: List = None) -> str:
         """Create a visualization from MongoDB data"""
-        logger.info(f"Creating {viz_type} visualization for collection: {collection_name}")
+        logger.info("Creating %s visualization for collection: %s", viz_type, collection_name)
         return "Visualization functionality is handled by the UI. This is a placeholder function."
 
-class MongoDBAgentSystem:
-    """MongoDB-specific agent system that uses the wrapper for function execution"""
-    
-    def __init__(self, connection_string: str, db_name: str, openai_model: str, openai_key: str):
-        """Initialize the MongoDB agent system"""
-        self.connection_string = connection_string
-        self.db_name = db_name
-        self.openai_model = openai_model
-        self.openai_key = openai_key
-        self.response_listeners = []
-        
-        # Initialize MongoDB explorer
-        from mongoDBExplorer import MongoDBExplorer
-        self.mongodb_explorer = MongoDBExplorer(db_name=db_name, connection_string=connection_string)
-        
-        # Initialize wrapper
-        self.wrapper = MongoDBAgentWrapper(self.mongodb_explorer)
-        
-        # Set up the agents
-        self.setup_agents()
-    
-    def setup_agents(self):
-        """Set up the specialized agents for MongoDB analysis"""
-        
-        # Define a code execution function that uses our wrapper
-        def execute_code(code):
-            """Execute code with access to MongoDB functions"""
-            try:
-                # Add MongoDB functions to the global scope
-                globals().update(self.wrapper.functions)
-                
-                # Execute the code
-                exec_locals = {}
-                exec(code, globals(), exec_locals)
-                
-                # Return any result
-                if '_result' in exec_locals:
-                    return exec_locals['_result']
-                return "Code executed successfully."
-            except Exception as e:
-                return f"Error executing code: {str(e)}"
-        
-        # Create a user proxy agent with the execute_code function
-        self.user_proxy = UserProxyAgent(
-            name="MongoDBUserProxy",
-            human_input_mode="NEVER",
-            code_execution_config={
-                "executor": execute_code,
-                "last_n_messages": 3,
-                "work_dir": "."
-            }
-        )
-        
-        # Create a MongoDB explorer assistant
-        self.mongodb_explorer_agent = AssistantAgent(
-            name="MongoDBExplorer",
-            llm_config={
-                "model": self.openai_model,
-                "api_key": self.openai_key,
-                "temperature": 0.1
-            },
-            system_message="""You are a MongoDB database exploration specialist.
+_EXPLORER_SYSTEM_MESSAGE = """You are a MongoDB database exploration specialist.
 Your role is to understand MongoDB database structure, schema, and relationships.
 
 When analyzing MongoDB databases, you can use these functions:
@@ -427,17 +564,8 @@ print(result)
 Always start exploration with explore_mongodb() followed by get_exploration_notes().
 Explain MongoDB concepts in clear, user-friendly terms.
 """
-        )
-        
-        # Create a MongoDB query specialist
-        self.query_specialist = AssistantAgent(
-            name="MongoDBQuerySpecialist",
-            llm_config={
-                "model": self.openai_model,
-                "api_key": self.openai_key,
-                "temperature": 0.2
-            },
-            system_message="""You are a MongoDB query specialist.
+
+_QUERY_SYSTEM_MESSAGE = """You are a MongoDB query specialist.
 Your expertise is in writing efficient, correct MongoDB queries.
 
 When querying MongoDB, you can use these functions:
@@ -445,6 +573,7 @@ When querying MongoDB, you can use these functions:
 - execute_aggregation(collection_name, pipeline) - Execute an aggregation
 - count_documents(collection_name, query) - Count documents
 - get_distinct_values(collection_name, field, query) - Get distinct values
+- get_field_summaries(collection_name, fields, query) - Count plus distinct values for several fields in one call
 
 When you need to use these functions, wrap them in a Python code block like this:
 ```python
@@ -455,17 +584,8 @@ print(result)
 Use proper MongoDB query syntax for the query parameter.
 For aggregations, use proper MongoDB aggregation pipeline stages.
 """
-        )
-        
-        # Create a MongoDB visualization specialist
-        self.viz_specialist = AssistantAgent(
-            name="MongoDBVisualizationSpecialist",
-            llm_config={
-                "model": self.openai_model,
-                "api_key": self.openai_key,
-                "temperature": 0.3
-            },
-            system_message="""You are a MongoDB data visualization specialist.
+
+_VIZ_SYSTEM_MESSAGE = """You are a MongoDB data visualization specialist.
 Your expertise is in creating effective visualizations for MongoDB data.
 
 When creating visualizations, you can use:
@@ -490,6 +610,66 @@ print(viz)
 
 Choose appropriate visualization types based on the data and question.
 """
+
+class MongoDBAgentSystem:
+    """MongoDB-specific agent system that uses the wrapper for function execution"""
+    
+    def __init__(self, connection_string: str, db_name: str, openai_model: str, openai_key: str):
+        """Initialize the MongoDB agent system"""
+        self.connection_string = connection_string
+        self.db_name = db_name
+        self.openai_model = openai_model
+        self.openai_key = openai_key
+        self.response_listeners = []
+        
+        # Shared llm_config; agents override only the temperature
+        self.base_llm_config = {"model": openai_model, "api_key": openai_key}
+        
+        # Initialize MongoDB explorer
+        from mongoDBExplorer import MongoDBExplorer
+        self.mongodb_explorer = MongoDBExplorer(db_name=db_name, connection_string=connection_string)
+        
+        # Initialize wrapper
+        self.wrapper = MongoDBAgentWrapper(self.mongodb_explorer)
+        
+        # Set up the agents
+        self.setup_agents()
+    
+    def setup_agents(self):
+        """Set up the specialized agents for MongoDB analysis"""
+        # Imported here so the wrapper functions can be used without paying autogen's import cost
+        from autogen import UserProxyAgent, AssistantAgent, GroupChat, GroupChatManager
+        
+        # Create a user proxy agent with the execute_code function
+        self.user_proxy = UserProxyAgent(
+            name="MongoDBUserProxy",
+            human_input_mode="NEVER",
+            code_execution_config={
+                "executor": execute_code,
+                "last_n_messages": 3,
+                "work_dir": "."
+            }
+        )
+        
+        # Create a MongoDB explorer assistant
+        self.mongodb_explorer_agent = AssistantAgent(
+            name="MongoDBExplorer",
+            llm_config={**self.base_llm_config, "temperature": 0.1},
+            system_message=_EXPLORER_SYSTEM_MESSAGE
+        )
+        
+        # Create a MongoDB query specialist
+        self.query_specialist = AssistantAgent(
+            name="MongoDBQuerySpecialist",
+            llm_config={**self.base_llm_config, "temperature": 0.2},
+            system_message=_QUERY_SYSTEM_MESSAGE
+        )
+        
+        # Create a MongoDB visualization specialist
+        self.viz_specialist = AssistantAgent(
+            name="MongoDBVisualizationSpecialist",
+            llm_config={**self.base_llm_config, "temperature": 0.3},
+            system_message=_VIZ_SYSTEM_MESSAGE
         )
         
         # Create the group chat
@@ -505,11 +685,7 @@ Choose appropriate visualization types based on the data and question.
         
         self.manager = GroupChatManager(
             groupchat=self.group_chat,
-            llm_config={
-                "model": self.openai_model,
-                "api_key": self.openai_key,
-                "temperature": 0.2
-            }
+            llm_config={**self.base_llm_config, "temperature": 0.2}
         )
     
     def add_response_listener(self, listener):
@@ -527,14 +703,11 @@ Choose appropriate visualization types based on the data and question.
     def start_interaction(self, message):
         """Start an interaction with the agent system"""
         try:
-            # Make sure MongoDB functions are in the global scope
-            globals().update(self.wrapper.functions)
-            
             # Start the chat with properly formed message
             return self.user_proxy.initiate_chat(
                 recipient=self.manager,
                 message=message
             )
         except Exception as e:
-            logger.error(f"Error in start_interaction: {str(e)}")
+            logger.error("Error in start_interaction: %s", e)
             raise Exception(f"Error starting interaction: {str(e)}")
\ No newline at end of file
@@ -1,11 +1,15 @@
 import re
+import ast
+import time
+import threading
 import logging
 import json
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Any, Optional, Callable
 from datetime import datetime
 
 from autogen import UserProxyAgent
-from bson import json_util
 
 # Set up logging
 logging.basicConfig(
@@ -14,6 +18,97 @@ logging.basicConfig(
 )
 logger = logging.getLogger('mongodb_user_proxy')
 
+# orjson is optional and only used to parse arguments; the stdlib json module is used without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Seconds before the cached collection name set is refreshed from MongoDB
+COLLECTIONS_CACHE_TTL = 30
+
+# Maximum number of code blocks from one message executed concurrently
+CODE_BLOCK_WORKERS = 8
+
+# Number of result rows shown for queries and aggregations
+DISPLAY_ROWS = 10
+
+# Query operators validate_query accepts at the top level of a query
+_VALID_TOP_OPERATORS = frozenset((
+    '$eq', '$gt', '$gte', '$lt', '$lte', '$ne', '$in', '$nin',
+    '$and', '$or', '$not', '$nor', '$exists', '$type', '$regex',
+    '$text', '$where', '$expr', '$jsonSchema', '$mod', '$elemMatch'
+))
+
+# Functions that read or write exploration state on the proxy; blocks calling them must run in order
+_STATEFUL_CALL_RE = re.compile(r"\b(?:explore_mongodb|get_exploration_notes)\s*\(")
+
+# Thread pool shared by every proxy for running a message's independent code blocks,
+# created on first use
+_code_block_executor = None
+_code_block_executor_lock = threading.Lock()
+
+def _get_code_block_executor() -> ThreadPoolExecutor:
+    """Create the shared code-block thread pool on first use"""
+    global _code_block_executor
+    with _code_block_executor_lock:
+        if _code_block_executor is None:
+            # PyMongo's default maxPoolSize (100) leaves each worker its own connection
+            _code_block_executor = ThreadPoolExecutor(max_workers=CODE_BLOCK_WORKERS)
+        return _code_block_executor
+
+# Python code blocks in agent messages, and single-line calls like `function_name(args)`
+_CODE_BLOCK_RE = re.compile(r"```python\s*(.*?)\s*```", re.DOTALL)
+_FUNC_CALL_RE = re.compile(r"(\w+)\((.*)\)$")
+
+# bson.json_util, imported on first use by the functions that serialize documents
+_json_util = None
+
+def _get_json_util():
+    """Import bson.json_util on first use"""
+    global _json_util
+    if _json_util is None:
+        from bson import json_util as _json_util
+    return _json_util
+
+def _dumps(obj: Any, indent: bool = False) -> str:
+    """Serialize to JSON, rendering BSON types (ObjectId, datetime, UUID) as Extended JSON
+    
+    orjson is not used here: it encodes datetime and UUID natively, so they would never
+    reach json_util.default and the output would depend on whether orjson is installed.
+    """
+    return json.dumps(obj, default=_get_json_util().default, indent=2 if indent else None)
+
+# Parses JSON-shaped arguments; orjson's errors subclass json.JSONDecodeError like the stdlib's
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+# JSON-style bare literals agents write in place of Python's True/False/None
+_LITERALS = {"true": True, "false": False, "null": None}
+
+def _coerce(token: str) -> Any:
+    """Coerce an argument that is not a Python literal into a value for a MongoDB function"""
+    if token in _LITERALS:
+        return _LITERALS[token]
+    
+    # JSON-shaped objects and arrays (such as pipelines using true/null) decode directly
+    if token[:1] in ("{", "["):
+        try:
+            return _json_loads(token)
+        except (ValueError, TypeError):
+            pass
+    
+    # Anything else (e.g. a bare collection name) is passed through as text
+    return token
+
+def _format_docs_preview(docs: List[Dict], total: int) -> str:
+    """Format the first DISPLAY_ROWS documents as JSON, noting how many more matched"""
+    preview = "\n---\n".join(_get_json_util().dumps(doc, indent=2) for doc in docs[:DISPLAY_ROWS])
+    
+    if total > DISPLAY_ROWS:
+        preview += f"\n... and {total - DISPLAY_ROWS} more documents"
+    
+    return preview
+
 class MongoDBUserProxy(UserProxyAgent):
     """Enhanced User Proxy agent with direct MongoDB function execution support"""
     
@@ -36,6 +131,8 @@ class MongoDBUserProxy(UserProxyAgent):
         
         self.mongodb_explorer = mongodb_explorer
         self.exploration_notes = None
+        self._collections_cache = None
+        self._collections_cache_ts = 0.0
         
         # Define functions dictionary for execution
         self.mongodb_functions = {
@@ -51,6 +148,14 @@ class MongoDBUserProxy(UserProxyAgent):
             "get_connection_status": self.get_connection_status
         }
     
+    def _get_collections(self) -> frozenset:
+        """Return collection names, refreshed from MongoDB at most every COLLECTIONS_CACHE_TTL seconds"""
+        now = time.monotonic()
+        if self._collections_cache is None or now - self._collections_cache_ts >= COLLECTIONS_CACHE_TTL:
+            self._collections_cache = frozenset(self.mongodb_explorer.db_client.list_collections())
+            self._collections_cache_ts = now
+        return self._collections_cache
+    
     def generate_reply(self, messages=None, sender=None, config=None):
         """Override generate_reply to handle Python code blocks with MongoDB functions"""
         # Get the latest message
@@ -59,28 +164,40 @@ class MongoDBUserProxy(UserProxyAgent):
         
         latest_message = messages[-1]["content"]
         
-        # Check if the message contains a Python code block
-        if "```python" in latest_message:
-            # Extract and execute all Python code blocks
-            pattern = r"```python\s*(.*?)\s*```"
-            code_blocks = re.findall(pattern, latest_message, re.DOTALL)
-            
-            if code_blocks:
-                modified_message = latest_message
-                
-                for i, code_block in enumerate(code_blocks):
-                    # Execute the code block and get the result
-                    result = self._execute_code_block(code_block)
-                    logger.info(f"Executed code block {i+1} with result: {result[:100]}...")
-                    
-                    # Replace the code block with the code + result
-                    original_block = f"```python\n{code_block}\n```"
-                    replacement = f"```python\n{code_block}\n```\n\n**Execution Results:**\n```\n{result}\n```"
-                    modified_message = modified_message.replace(original_block, replacement)
-                
-                # Return the modified message
-                logger.info("Generated reply with executed code blocks")
-                return {"content": modified_message}
+        # Messages without a Python code block go straight to the default handler
+        start = latest_message.find("```python")
+        if start < 0:
+            logger.info("Using default handler for message without code blocks")
+            return super().generate_reply(messages=messages, sender=sender, config=config)
+        
+        # Start the regex at the first block instead of rescanning the message prefix
+        matches = list(_CODE_BLOCK_RE.finditer(latest_message, start))
+        code_blocks = [match.group(1) for match in matches]
+        
+        # Independent blocks run concurrently since each mostly waits on MongoDB; blocks that
+        # explore or read the exploration notes depend on each other's order, so run those serially
+        if len(code_blocks) > 1 and not any(_STATEFUL_CALL_RE.search(block) for block in code_blocks):
+            results = list(_get_code_block_executor().map(self._execute_code_block, code_blocks))
+        else:
+            results = [self._execute_code_block(code_block) for code_block in code_blocks]
+        
+        # Rebuild the message in one left-to-right pass, appending results after each code block
+        parts = []
+        last_end = 0
+        
+        for i, (match, result) in enumerate(zip(matches, results)):
+            logger.info(f"Executed code block {i+1} with result: {result[:100]}...")
+            
+            parts.append(latest_message[last_end:match.end()])
+            parts.append(f"\n\n**Execution Results:**\n```\n{result}\n```")
+            last_end = match.end()
+        
+        if parts:
+            parts.append(latest_message[last_end:])
+            
+            # Return the modified message
+            logger.info("Generated reply with executed code blocks")
+            return {"content": "".join(parts)}
         
         # Default handler for non-code messages
         logger.info("Using default handler for message without code blocks")
@@ -107,18 +224,24 @@ class MongoDBUserProxy(UserProxyAgent):
                 line = line.strip()
                 
                 # Skip empty lines and comments
-                if not line or line.startswith('#'):
+                if not line or line[:1] == '#':
+                    continue
+                
+                # Cheap pre-check so obvious non-calls skip the regex
+                if not (line.endswith(")") and "(" in line):
+                    result += f"# Warning: Could not parse as function call: {line}\n"
                     continue
                 
                 # Try to match a function call pattern: function_name(args)
-                match = re.match(r'(\w+)\((.*)\)$', line)
+                match = _FUNC_CALL_RE.match(line)
                 if match:
                     func_name = match.group(1)
                     args_str = match.group(2)
                     
                     # Check if this is a MongoDB function
-                    if func_name in self.mongodb_functions:
-                        func_result = self._call_mongodb_function(func_name, args_str)
+                    func = self.mongodb_functions.get(func_name)
+                    if func is not None:
+                        func_result = self._call_mongodb_function(func_name, func, args_str)
                         result += f"# Result of {func_name}():\n{func_result}\n\n"
                     else:
                         result += f"# Error: Function '{func_name}' is not a registered MongoDB function\n\n"
@@ -136,20 +259,18 @@ class MongoDBUserProxy(UserProxyAgent):
             logger.error(error_msg)
             return error_msg
     
-    def _call_mongodb_function(self, func_name: str, args_str: str) -> str:
+    def _call_mongodb_function(self, func_name: str, func: Callable, args_str: str) -> str:
         """Call a MongoDB function with parsed arguments
         
         Args:
             func_name: Name of the MongoDB function
+            func: The bound MongoDB function, already looked up by the caller
             args_str: String representation of function arguments
             
         Returns:
             Function execution result as string
         """
         try:
-            # Get the function
-            func = self.mongodb_functions[func_name]
-            
             # Parse arguments
             args, kwargs = self._parse_arguments(args_str)
             
@@ -166,124 +287,40 @@ class MongoDBUserProxy(UserProxyAgent):
     def _parse_arguments(self, args_str: str) -> tuple:
         """Parse function arguments from string
         
+        The arguments are parsed as a Python call expression; each argument that
+        is a Python literal is evaluated, anything else is kept as its source text.
+        
         Args:
             args_str: String representation of function arguments
             
         Returns:
             Tuple of (positional_args, keyword_args)
+            
+        Raises:
+            ValueError: If the arguments are not a plain call argument list
         """
         if not args_str.strip():
             return [], {}
         
-        # Split by commas, but respect quotes and nested structures
-        # This is a simple implementation - a more robust parser could be implemented
-        args = []
-        kwargs = {}
+        source = f"__f({args_str})"
+        call = ast.parse(source, mode="eval").body
+        if not isinstance(call, ast.Call):
+            raise ValueError(f"Could not parse arguments: {args_str}")
         
-        # Replace any None with Python None
-        args_str = args_str.replace("None", "None")
+        # Unpacked arguments can't be resolved without running the code
+        if any(keyword.arg is None for keyword in call.keywords) or \
+                any(isinstance(node, ast.Starred) for node in call.args):
+            raise ValueError("Unpacked *args/**kwargs arguments are not supported; pass arguments explicitly")
         
-        # Handle keyword arguments
-        if '=' in args_str:
-            # Split by commas, but not inside quotes or brackets
-            parts = []
-            current = ""
-            in_quotes = False
-            quote_char = None
-            bracket_level = 0
-            
-            for char in args_str:
-                if char in ['"', "'"]:
-                    if not in_quotes:
-                        in_quotes = True
-                        quote_char = char
-                    elif char == quote_char:
-                        in_quotes = False
-                        quote_char = None
-                
-                if char == '{':
-                    bracket_level += 1
-                elif char == '}':
-                    bracket_level -= 1
-                
-                if char == ',' and not in_quotes and bracket_level == 0:
-                    parts.append(current)
-                    current = ""
-                else:
-                    current += char
-            
-            if current:
-                parts.append(current)
-            
-            # Process each part
-            for part in parts:
-                part = part.strip()
-                if '=' in part:
-                    key, value = part.split('=', 1)
-                    key = key.strip()
-                    value = value.strip()
-                    
-                    # Handle different value types
-                    if value == "None":
-                        kwargs[key] = None
-                    elif value.lower() == "true":
-                        kwargs[key] = True
-                    elif value.lower() == "false":
-                        kwargs[key] = False
-                    elif value.isdigit():
-                        kwargs[key] = int(value)
-                    elif value.replace('.', '', 1).isdigit():
-                        kwargs[key] = float(value)
-                    elif (value.startswith('"') and value.endswith('"')) or \
-                         (value.startswith("'") and value.endswith("'")):
-                        kwargs[key] = value[1:-1]  # Remove quotes
-                    elif value.startswith('{') and value.endswith('}'):
-                        # Try to parse as JSON
-                        try:
-                            kwargs[key] = json.loads(value)
-                        except:
-                            kwargs[key] = value
-                    else:
-                        kwargs[key] = value
-                else:
-                    # Handle positional argument
-                    if part == "None":
-                        args.append(None)
-                    elif part.lower() == "true":
-                        args.append(True)
-                    elif part.lower() == "false":
-                        args.append(False)
-                    elif part.isdigit():
-                        args.append(int(part))
-                    elif part.replace('.', '', 1).isdigit():
-                        args.append(float(part))
-                    elif (part.startswith('"') and part.endswith('"')) or \
-                         (part.startswith("'") and part.endswith("'")):
-                        args.append(part[1:-1])  # Remove quotes
-                    else:
-                        args.append(part)
-        else:
-            # No keyword arguments, just positional
-            for part in args_str.split(','):
-                part = part.strip()
-                if not part:
-                    continue
-                    
-                if part == "None":
-                    args.append(None)
-                elif part.lower() == "true":
-                    args.append(True)
-                elif part.lower() == "false":
-                    args.append(False)
-                elif part.isdigit():
-                    args.append(int(part))
-                elif part.replace('.', '', 1).isdigit():
-                    args.append(float(part))
-                elif (part.startswith('"') and part.endswith('"')) or \
-                     (part.startswith("'") and part.endswith("'")):
-                    args.append(part[1:-1])  # Remove quotes
-                else:
-                    args.append(part)
+        def evaluate(node):
+            try:
+                return ast.literal_eval(node)
+            except (ValueError, TypeError):
+                # Not a Python literal (e.g. JSON true/null, a bare name, or an unhashable dict key)
+                return _coerce(ast.get_source_segment(source, node))
+        
+        args = [evaluate(node) for node in call.args]
+        kwargs = {keyword.arg: evaluate(keyword.value) for keyword in call.keywords}
         
         return args, kwargs
     
@@ -295,6 +332,7 @@ class MongoDBUserProxy(UserProxyAgent):
         """Explore the MongoDB database and return notes"""
         try:
             logger.info("Executing explore_mongodb function")
+            self._collections_cache = None
             exploration_results = self.mongodb_explorer.explore_database()
             self.exploration_notes = self.mongodb_explorer.generate_notes()
             
@@ -336,14 +374,13 @@ class MongoDBUserProxy(UserProxyAgent):
             logger.info(f"Executing query on collection: {collection_name}")
             
             # Check collection exists
-            collections = self.mongodb_explorer.db_client.list_collections()
-            if collection_name not in collections:
+            if collection_name not in self._get_collections():
                 return f"Error: Collection '{collection_name}' does not exist in the database."
             
             # Convert string representation of query to dict if needed
             if isinstance(query, str):
                 try:
-                    query = json.loads(query)
+                    query = _json_loads(query)
                 except json.JSONDecodeError:
                     return "Error: Invalid query JSON format. The query could not be parsed."
             
@@ -354,44 +391,43 @@ class MongoDBUserProxy(UserProxyAgent):
             # Convert string representation of sort to list if needed
             if isinstance(sort, str):
                 try:
-                    sort = json.loads(sort)
+                    sort = _json_loads(sort)
                 except json.JSONDecodeError:
                     return "Error: Invalid sort JSON format. The sort specification could not be parsed."
             
             # Convert projection if needed
             if isinstance(projection, str):
                 try:
-                    projection = json.loads(projection)
+                    projection = _json_loads(projection)
                 except json.JSONDecodeError:
                     return "Error: Invalid projection JSON format."
             
-            # Build query params
-            query_params = {
-                "query": query,
-                "limit": limit,
-                "sort": sort,
-                "projection": projection
-            }
-            
-            # Execute the query
-            df = self.mongodb_explorer.execute_query(collection_name, query_params)
+            # Only the displayed rows are fetched; the total comes from a server-side count
+            db_client = self.mongodb_explorer.db_client
+            display_limit = min(limit, DISPLAY_ROWS) if limit > 0 else DISPLAY_ROWS
+            docs = list(db_client.iter_many(
+                collection_name,
+                query=query,
+                projection=projection,
+                sort=sort,
+                limit=display_limit,
+                batch_size=display_limit
+            ))
+            
+            total = len(docs)
+            if total == DISPLAY_ROWS:
+                total = db_client.count_documents(collection_name, query)
+                if limit > 0:
+                    total = min(total, limit)
             
             # Return results
-            if df.empty:
+            if not docs:
                 return "Query returned no results."
             
             # Format the results
-            results_str = f"Query returned {len(df)} documents.\n"
-            
-            # Handle ObjectId and other MongoDB-specific types for display
-            import pandas as pd
-            pd.set_option('display.max_colwidth', 30)
+            results_str = f"Query returned {total} documents.\n"
             
-            # Format the DataFrame for display
-            results_str += df.head(10).to_string()
-            
-            if len(df) > 10:
-                results_str += f"\n... and {len(df) - 10} more documents"
+            results_str += _format_docs_preview(docs, total)
                 
             return results_str
         except Exception as e:
@@ -405,14 +441,13 @@ class MongoDBUserProxy(UserProxyAgent):
             logger.info(f"Executing aggregation on collection: {collection_name}")
             
             # Check collection exists
-            collections = self.mongodb_explorer.db_client.list_collections()
-            if collection_name not in collections:
+            if collection_name not in self._get_collections():
                 return f"Error: Collection '{collection_name}' does not exist in the database."
             
             # Convert string representation to appropriate format if needed
             if isinstance(aggregation_pipeline, str):
                 try:
-                    aggregation_pipeline = json.loads(aggregation_pipeline)
+                    aggregation_pipeline = _json_loads(aggregation_pipeline)
                 except json.JSONDecodeError:
                     return "Error: Invalid aggregation pipeline JSON format."
             
@@ -420,23 +455,25 @@ class MongoDBUserProxy(UserProxyAgent):
             if not isinstance(aggregation_pipeline, list):
                 return "Error: MongoDB aggregation pipeline must be an array of stages."
             
-            # Execute the aggregation
-            df = self.mongodb_explorer.execute_aggregation(collection_name, aggregation_pipeline)
+            # Fetch one row past the display limit to tell whether there are more, instead of
+            # draining (and decoding) the rest of the cursor just to count it
+            cursor = self.mongodb_explorer.db_client.iter_aggregate(collection_name, aggregation_pipeline)
+            try:
+                docs = list(islice(cursor, DISPLAY_ROWS + 1))
+            finally:
+                cursor.close()
             
             # Return results
-            if df.empty:
+            if not docs:
                 return "Aggregation returned no results."
             
             # Format the results
-            results_str = f"Aggregation returned {len(df)} documents.\n"
-            
-            # Format the DataFrame for display
-            import pandas as pd
-            pd.set_option('display.max_colwidth', 30)
-            results_str += df.head(10).to_string()
+            if len(docs) > DISPLAY_ROWS:
+                results_str = f"Aggregation returned more than {DISPLAY_ROWS} documents; showing the first {DISPLAY_ROWS}.\n"
+            else:
+                results_str = f"Aggregation returned {len(docs)} documents.\n"
             
-            if len(df) > 10:
-                results_str += f"\n... and {len(df) - 10} more documents"
+            results_str += _format_docs_preview(docs[:DISPLAY_ROWS], len(docs[:DISPLAY_ROWS]))
                 
             return results_str
         except Exception as e:
@@ -450,8 +487,7 @@ class MongoDBUserProxy(UserProxyAgent):
             logger.info(f"Getting sample from collection: {collection_name}")
             
             # Check collection exists
-            collections = self.mongodb_explorer.db_client.list_collections()
-            if collection_name not in collections:
+            if collection_name not in self._get_collections():
                 return f"Error: Collection '{collection_name}' does not exist in the database."
             
             # Get sample documents
@@ -465,7 +501,7 @@ class MongoDBUserProxy(UserProxyAgent):
                 return f"No documents found in collection '{collection_name}'."
             
             # Format samples as readable JSON
-            sample_json = json.dumps(samples, indent=2, default=json_util.default)
+            sample_json = _dumps(samples, indent=True)
             
             return f"Sample of {len(samples)} documents from '{collection_name}':\n{sample_json}"
         except Exception as e:
@@ -479,14 +515,15 @@ class MongoDBUserProxy(UserProxyAgent):
             logger.info(f"Counting documents in collection: {collection_name}")
             
             # Check collection exists
-            collections = self.mongodb_explorer.db_client.list_collections()
-            if collection_name not in collections:
+            if collection_name not in self._get_collections():
                 return f"Error: Collection '{collection_name}' does not exist in the database."
             
-            # Convert string representation of query to dict if needed
+            # Convert string representation of query to dict if needed, keeping the
+            # original text for display instead of re-serializing it
+            query_repr = query if isinstance(query, str) else None
             if isinstance(query, str):
                 try:
-                    query = json.loads(query)
+                    query = _json_loads(query)
                 except json.JSONDecodeError:
                     return "Error: Invalid query JSON format"
             
@@ -498,7 +535,10 @@ class MongoDBUserProxy(UserProxyAgent):
             count = self.mongodb_explorer.db_client.count_documents(collection_name, query)
             
             # Return formatted result
-            filter_str = "" if not query or query == {} else f" matching query {json.dumps(query)}"
+            if not query:
+                filter_str = ""
+            else:
+                filter_str = f" matching query {query_repr or _dumps(query)}"
             return f"Collection '{collection_name}' contains {count} documents{filter_str}."
         except Exception as e:
             error_msg = f"Error counting documents: {str(e)}"
@@ -511,14 +551,13 @@ class MongoDBUserProxy(UserProxyAgent):
             logger.info(f"Validating query for collection: {collection_name}")
             
             # Check if collection exists
-            collections = self.mongodb_explorer.db_client.list_collections()
-            if collection_name not in collections:
+            if collection_name not in self._get_collections():
                 return f"Error: Collection '{collection_name}' does not exist in the database."
             
             # Convert string representation of query to dict if needed
             if isinstance(query, str):
                 try:
-                    query = json.loads(query)
+                    query = _json_loads(query)
                 except json.JSONDecodeError:
                     return "Error: Invalid query JSON format. The query could not be parsed."
             
@@ -526,14 +565,10 @@ class MongoDBUserProxy(UserProxyAgent):
                 return "Error: Query must be a dictionary (JSON object)."
             
             # Check for valid MongoDB operators
-            invalid_operators = []
-            for key in query.keys():
-                if key.startswith('$') and key not in [
-                    '$eq', '$gt', '$gte', '$lt', '$lte', '$ne', '$in', '$nin', 
-                    '$and', '$or', '$not', '$nor', '$exists', '$type', '$regex',
-                    '$text', '$where', '$expr', '$jsonSchema', '$mod', '$elemMatch'
-                ]:
-                    invalid_operators.append(key)
+            invalid_operators = [
+                key for key in query
+                if key.startswith('$') and key not in _VALID_TOP_OPERATORS
+            ]
             
             if invalid_operators:
                 return f"Error: Query contains invalid MongoDB operators: {', '.join(invalid_operators)}"
@@ -544,20 +579,19 @@ class MongoDBUserProxy(UserProxyAgent):
             logger.error(error_msg)
             return error_msg
     
-    def get_distinct_values(self, collection_name: str, field: str, query: Any = None) -> str:
+    def get_distinct_values(self, collection_name: str, field: str, query: Any = None, limit: int = 50) -> str:
         """Get distinct values for a field in a collection"""
         try:
             logger.info(f"Getting distinct values for field '{field}' in collection: {collection_name}")
             
             # Check collection exists
-            collections = self.mongodb_explorer.db_client.list_collections()
-            if collection_name not in collections:
+            if collection_name not in self._get_collections():
                 return f"Error: Collection '{collection_name}' does not exist in the database."
             
             # Convert string representation of query to dict if needed
             if isinstance(query, str):
                 try:
-                    query = json.loads(query)
+                    query = _json_loads(query)
                 except json.JSONDecodeError:
                     return "Error: Invalid query JSON format"
             
@@ -565,26 +599,34 @@ class MongoDBUserProxy(UserProxyAgent):
             if query is None:
                 query = {}
                 
-            # Get distinct values
-            values = self.mongodb_explorer.db_client.distinct(collection_name, field, query)
+            # Let the server stop after one value past the limit instead of shipping
+            # every distinct value. Array fields are unwound into their elements like
+            # distinct(), keeping null/missing/empty-array documents as in the wrapper
+            pipeline = [
+                {"$unwind": {"path": f"${field}", "preserveNullAndEmptyArrays": True}},
+                {"$group": {"_id": f"${field}"}},
+                {"$limit": limit + 1}
+            ]
+            if query:
+                pipeline.insert(0, {"$match": query})
+            
+            values = [doc["_id"] for doc in self.mongodb_explorer.db_client.aggregate(collection_name, pipeline)]
             
             # Format output
             if not values:
                 return f"No distinct values found for field '{field}' in collection '{collection_name}'."
             
-            # Limit number of displayed values if too many
-            display_limit = 50
-            display_values = values[:display_limit]
-            additional_count = len(values) - display_limit if len(values) > display_limit else 0
+            has_more = len(values) > limit
             
             # Format values as string
-            values_str = json.dumps(display_values, default=json_util.default)
+            values_str = _dumps(values[:limit])
             
-            result = f"Found {len(values)} distinct values for field '{field}' in collection '{collection_name}'.\n"
+            count_str = f"more than {limit}" if has_more else str(len(values))
+            result = f"Found {count_str} distinct values for field '{field}' in collection '{collection_name}'.\n"
             result += f"Values: {values_str}"
             
-            if additional_count > 0:
-                result += f"\n... and {additional_count} more values"
+            if has_more:
+                result += "\n... and more values"
                 
             return result
         except Exception as e:
@@ -597,22 +639,16 @@ class MongoDBUserProxy(UserProxyAgent):
         try:
             logger.info("Checking MongoDB connection status")
             
-            # Test the connection
-            is_connected = self.mongodb_explorer.db_client.ping()
+            # One dbStats roundtrip answers both "are we connected" and the size figures
+            status = self.mongodb_explorer.one_shot_status()
             
-            if is_connected:
-                # Get database stats
-                stats = self.mongodb_explorer.db_client.get_database_stats()
-                
-                db_name = self.mongodb_explorer.db_client.db.name
-                collections = len(self.mongodb_explorer.db_client.list_collections())
-                
+            if status["ok"]:
                 return (
-                    f"✅ Connected to MongoDB database: {db_name}\n"
-                    f"Collections: {collections}\n"
-                    f"Storage size: {stats.get('storageSize', 'unknown')} bytes\n"
-                    f"Objects: {stats.get('objects', 'unknown')}\n"
-                    f"Indexes: {stats.get('indexes', 'unknown')}"
+                    f"✅ Connected to MongoDB database: {status['db']}\n"
+                    f"Collections: {status['collections']}\n"
+                    f"Storage size: {status['storageSize']} bytes\n"
+                    f"Objects: {status['objects']}\n"
+                    f"Indexes: {status['indexes']}"
                 )
             else:
                 return "❌ Not connected to MongoDB. Check connection parameters."
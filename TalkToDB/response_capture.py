@@ -7,14 +7,18 @@ MongoDBAgentSystem implementation.
 """
 
 from typing import Dict, List, Any, Callable, Optional
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
-from datetime import datetime
+import os
+import base64
+import time
 import logging
-import traceback
-from bson import json_util
+from bson import json_util, ObjectId, Decimal128, decode
+from bson.raw_bson import RawBSONDocument
 import json
-import types
+import functools
+from collections import deque
 
 # Set up logging
 logging.basicConfig(
@@ -23,9 +27,105 @@ logging.basicConfig(
 )
 logger = logging.getLogger('mongodb_response_capture')
 
+# orjson is optional; the stdlib json module is used when it is not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# ObjectId.binary is the raw 12 bytes; bytes.hex() gives the same 24-char string as str().
+# Other values (str ids, NaN from missing _ids) in a mixed column fall back to str()
+_oid_to_hex = np.frompyfunc(lambda o: o.binary.hex() if isinstance(o, ObjectId) else str(o), 1, 1)
+
+# Maximum number of responses kept by ResponseCapture; older ones are dropped first
+MAX_RESPONSES = int(os.environ.get("RESPONSE_CAPTURE_MAX", "10000"))
+
+# Fields kept in exported history entries, and their defaults ("time" defaults to now)
+_HISTORY_KEYS = ("agent", "content", "role", "type", "time")
+_HISTORY_DEFAULTS = {"agent": "System", "content": "", "role": "assistant", "type": "text"}
+
+# Last formatted wall-clock second, so strftime runs at most once per second
+_last_second = [0, ""]
+
+def _now_hms():
+    """Current local time as HH:MM:SS, reformatted only when the second changes"""
+    s = int(time.time())
+    if s != _last_second[0]:
+        _last_second[0] = s
+        _last_second[1] = time.strftime("%H:%M:%S", time.localtime(s))
+    return _last_second[1]
+
+def _to_jsonable(obj):
+    """JSON default hook for BSON types orjson and json can't serialize natively"""
+    if isinstance(obj, ObjectId):
+        return {"$oid": str(obj)}
+    if isinstance(obj, Decimal128):
+        return str(obj)
+    if isinstance(obj, bytes):
+        return base64.b64encode(obj).decode()
+    return json_util.default(obj)
+
+def _dump_json_bytes(obj, indent=False, newline=False):
+    """Serialize obj to UTF-8 JSON bytes with orjson when available, else the json module"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if newline:
+            option |= orjson.OPT_APPEND_NEWLINE
+        return orjson.dumps(obj, default=_to_jsonable, option=option)
+    text = json.dumps(obj, default=_to_jsonable, indent=2 if indent else None, ensure_ascii=False)
+    return (text + "\n" if newline else text).encode("utf-8")
+
+def _ids_to_str(ids):
+    """Convert an _id column (ObjectIds or other values) to strings"""
+    ids = ids.to_numpy(copy=False)
+    if ids.dtype == object:
+        # Convert element by element; the column may mix ObjectIds with other values
+        return _oid_to_hex(ids).astype(object)
+    return ids.astype(str)
+
+def _attach_data(response, df):
+    """Attach a MongoDB query result DataFrame to a captured response"""
+    response["type"] = "data"
+    response["data"] = df
+    
+    # Defer ObjectId -> str conversion until the frame is actually displayed
+    if "_id" in df.columns and df["_id"].dtype == object:
+        df.attrs["_needs_id_strify"] = True
+    
+    logger.info("Captured MongoDB data response from %s with %d rows", response["agent"], len(df))
+
+# MongoDB theme applied to captured visualizations, validated once at import
+_MONGODB_THEME = go.Layout(
+    template="plotly",
+    title_font=dict(color="#4DB33D"),  # MongoDB green
+    plot_bgcolor="white",
+    paper_bgcolor="white"
+)
+
+def _attach_visualization(response, fig):
+    """Attach a MongoDB visualization to a captured response"""
+    response["type"] = "visualization"
+    response["visualization"] = fig
+    
+    # Add MongoDB specific theming to the visualization
+    fig.update_layout(_MONGODB_THEME)
+    
+    logger.info("Captured MongoDB visualization response from %s", response["agent"])
+
+# Metadata value type -> handler, so on_response does a dict lookup instead of isinstance checks
+_HANDLERS = {
+    pd.DataFrame: _attach_data,
+    go.Figure: _attach_visualization,
+}
+
 class ResponseListener:
     """Interface for objects that listen to MongoDB agent responses"""
     
+    # Response types this listener consumes: "text", "data" and/or "visualization"
+    wants = frozenset({"text", "data", "visualization"})
+    
     def on_response(self, agent_name: str, message: str, metadata: Optional[Dict] = None):
         """Handle a response from a MongoDB agent"""
         pass
@@ -33,8 +133,12 @@ class ResponseListener:
 class ResponseCapture(ResponseListener):
     """Captures responses from MongoDB agents for use with UI interfaces"""
     
-    def __init__(self):
-        self.responses = []
+    def __init__(self, wants=None):
+        if wants is not None:
+            self.wants = frozenset(wants)
+        # Only probe metadata for the rich types this capture actually consumes
+        self._rich_keys = tuple(k for k in ("data", "visualization") if k in self.wants)
+        self.responses = deque(maxlen=MAX_RESPONSES)
         self.latest_response = None
         logger.info("MongoDB ResponseCapture initialized")
         
@@ -47,42 +151,23 @@ class ResponseCapture(ResponseListener):
                 "content": message,
                 "role": "assistant",
                 "type": "text",
-                "time": datetime.now().strftime("%H:%M:%S"),
+                "time": _now_hms(),
                 "metadata": metadata or {}
             }
             
-            # Check if the response contains MongoDB data (table/DataFrame)
-            if metadata and "data" in metadata and isinstance(metadata["data"], pd.DataFrame):
-                response["type"] = "data"
-                response["data"] = metadata["data"]
-                
-                # Apply MongoDB-specific formatting to the DataFrame if needed
-                if "_id" in response["data"].columns:
-                    # Ensure ObjectId values are properly converted to strings
-                    response["data"]["_id"] = response["data"]["_id"].astype(str)
-                
-                logger.info(f"Captured MongoDB data response from {agent_name} with {len(response['data'])} rows")
-            
-            # Check if the response contains a MongoDB visualization
-            if metadata and "visualization" in metadata and isinstance(metadata["visualization"], go.Figure):
-                response["type"] = "visualization"
-                response["visualization"] = metadata["visualization"]
-                
-                # Add MongoDB specific theming to the visualization
-                if hasattr(response["visualization"], "update_layout"):
-                    response["visualization"].update_layout(
-                        template="plotly",
-                        title_font=dict(color="#4DB33D"),  # MongoDB green
-                        plot_bgcolor="white",
-                        paper_bgcolor="white"
-                    )
-                
-                logger.info(f"Captured MongoDB visualization response from {agent_name}")
+            # Attach DataFrames and figures with one type lookup per field
+            if metadata:
+                for key in self._rich_keys:
+                    value = metadata.get(key)
+                    if value is not None:
+                        handler = _HANDLERS.get(type(value))
+                        if handler:
+                            handler(response, value)
             
             # Check for MongoDB-specific response types
             if metadata and "mongodb_type" in metadata:
                 response["mongodb_type"] = metadata["mongodb_type"]
-                logger.info(f"Captured MongoDB-specific response type: {metadata['mongodb_type']}")
+                logger.info("Captured MongoDB-specific response type: %s", metadata["mongodb_type"])
             
             # Store the response
             self.responses.append(response)
@@ -91,9 +176,7 @@ class ResponseCapture(ResponseListener):
             return response
             
         except Exception as e:
-            error_msg = f"Error processing MongoDB response: {str(e)}"
-            logger.error(error_msg)
-            traceback.print_exc()
+            logger.exception("Error processing MongoDB response")
             
             # Create an error response
             error_response = {
@@ -101,7 +184,7 @@ class ResponseCapture(ResponseListener):
                 "content": f"Error processing response: {str(e)}",
                 "role": "assistant",
                 "type": "text",
-                "time": datetime.now().strftime("%H:%M:%S")
+                "time": _now_hms()
             }
             
             self.responses.append(error_response)
@@ -112,58 +195,72 @@ class ResponseCapture(ResponseListener):
     # Add an alias for compatibility with existing code
     capture_response = on_response
 
+    @staticmethod
+    def _sanitize(response, include_metadata=False):
+        """Copy a captured response without large objects like DataFrames and figures"""
+        merged = {**_HISTORY_DEFAULTS, **response}
+        if "time" not in merged:
+            merged["time"] = _now_hms()
+        response_copy = {k: merged[k] for k in _HISTORY_KEYS}
+        
+        # Optionally include metadata (excluding large objects)
+        if include_metadata and "metadata" in response:
+            # Filter out large objects like dataframes and visualizations
+            metadata_copy = {k: v for k, v in response["metadata"].items() 
+                           if k not in ["data", "visualization"]}
+            response_copy["metadata"] = metadata_copy
+        
+        # Add MongoDB specific type if present
+        if "mongodb_type" in response:
+            response_copy["mongodb_type"] = response["mongodb_type"]
+        
+        return response_copy
+
     def get_conversation_history(self, include_metadata=False):
         """Get the captured conversation history in a format suitable for exporting"""
         try:
-            history = []
-            
-            for response in self.responses:
-                # Create a copy without large objects
-                response_copy = {
-                    "agent": response.get("agent", "System"),
-                    "content": response.get("content", ""),
-                    "role": response.get("role", "assistant"),
-                    "type": response.get("type", "text"),
-                    "time": response.get("time", datetime.now().strftime("%H:%M:%S"))
-                }
-                
-                # Optionally include metadata (excluding large objects)
-                if include_metadata and "metadata" in response:
-                    # Filter out large objects like dataframes and visualizations
-                    metadata_copy = {k: v for k, v in response["metadata"].items() 
-                                   if k not in ["data", "visualization"]}
-                    response_copy["metadata"] = metadata_copy
-                
-                # Add MongoDB specific type if present
-                if "mongodb_type" in response:
-                    response_copy["mongodb_type"] = response["mongodb_type"]
-                
-                history.append(response_copy)
-            
-            return history
+            return [self._sanitize(response, include_metadata) for response in self.responses]
             
         except Exception as e:
-            logger.error(f"Error getting conversation history: {str(e)}")
+            logger.error("Error getting conversation history: %s", e)
             return []
     
     def export_to_json(self, filepath):
-        """Export the conversation history to a JSON file"""
+        """Export the conversation history to a JSON file, one response at a time"""
         try:
-            history = self.get_conversation_history()
+            with open(filepath, "wb") as f:
+                f.write(b"[")
+                for i, response in enumerate(self.responses):
+                    if i:
+                        f.write(b",")
+                    f.write(b"\n")
+                    f.write(_dump_json_bytes(self._sanitize(response), indent=True))
+                f.write(b"\n]")
+                
+            logger.info("Successfully exported conversation history to %s", filepath)
+            return True
             
-            with open(filepath, "w") as f:
-                json.dump(history, f, indent=2, default=json_util.default)
+        except Exception as e:
+            logger.error("Error exporting conversation history: %s", e)
+            return False
+    
+    def export_to_jsonl(self, filepath):
+        """Export the conversation history to a JSON Lines file, one response per line"""
+        try:
+            with open(filepath, "wb") as f:
+                for response in self.responses:
+                    f.write(_dump_json_bytes(self._sanitize(response), newline=True))
                 
-            logger.info(f"Successfully exported conversation history to {filepath}")
+            logger.info("Successfully exported conversation history to %s", filepath)
             return True
             
         except Exception as e:
-            logger.error(f"Error exporting conversation history: {str(e)}")
+            logger.error("Error exporting conversation history: %s", e)
             return False
     
     def clear(self):
         """Clear all captured responses"""
-        self.responses = []
+        self.responses.clear()
         self.latest_response = None
         logger.info("Cleared all captured responses")
 
@@ -175,6 +272,11 @@ class MongoDBResponseFormatter:
     def format_document(doc, max_length=1000):
         """Format a MongoDB document as a readable string"""
         try:
+            if isinstance(doc, (bytes, RawBSONDocument)):
+                # Raw BSON is decoded in C and rendered like any other document
+                raw = doc.raw if isinstance(doc, RawBSONDocument) else doc
+                doc = decode(raw)
+            
             # Convert to JSON string with proper handling of MongoDB types
             json_str = json.dumps(doc, indent=2, default=json_util.default)
             
@@ -185,7 +287,7 @@ class MongoDBResponseFormatter:
             return json_str
             
         except Exception as e:
-            logger.error(f"Error formatting MongoDB document: {str(e)}")
+            logger.error("Error formatting MongoDB document: %s", e)
             return str(doc)
     
     @staticmethod
@@ -215,9 +317,16 @@ class MongoDBResponseFormatter:
             return "\n".join(result)
             
         except Exception as e:
-            logger.error(f"Error formatting MongoDB collection info: {str(e)}")
+            logger.error("Error formatting MongoDB collection info: %s", e)
             return str(collection_info)
     
+    @staticmethod
+    def prepare_dataframe(df):
+        """Stringify a captured DataFrame's ObjectId _id column before display"""
+        if df.attrs.pop("_needs_id_strify", False):
+            df["_id"] = _ids_to_str(df["_id"])
+        return df
+    
     @staticmethod
     def format_query_result(df, max_rows=10):
         """Format query result DataFrame as a readable string"""
@@ -230,8 +339,12 @@ class MongoDBResponseFormatter:
             
             result = [f"Query returned {total_rows} documents.\n"]
             
-            # Display the first max_rows rows
-            result.append(df.head(max_rows).to_string())
+            # Display the first max_rows rows with bounded width so pandas skips auto-fitting
+            preview = df.iloc[:max_rows]
+            if df.attrs.get("_needs_id_strify"):
+                preview = preview.copy()
+                preview["_id"] = _ids_to_str(preview["_id"])
+            result.append(preview.to_string(max_cols=20, max_colwidth=40, show_dimensions=False, index=False))
             
             if total_rows > max_rows:
                 result.append(f"\n... and {total_rows - max_rows} more documents")
@@ -239,10 +352,67 @@ class MongoDBResponseFormatter:
             return "\n".join(result)
             
         except Exception as e:
-            logger.error(f"Error formatting MongoDB query result: {str(e)}")
+            logger.error("Error formatting MongoDB query result: %s", e)
             return str(df)
 
 
+def _listener_callback(listener):
+    """Resolve the callable used to notify a listener, or None if it can't be notified"""
+    if hasattr(listener, 'on_response'):
+        return listener.on_response
+    return listener if callable(listener) else None
+
+def _add_response_listener(agent_system, listener):
+    """add_response_listener implementation bound onto patched agent systems"""
+    agent_system.response_listeners.append(listener)
+    callback = _listener_callback(listener)
+    if callback is not None:
+        agent_system._listener_callbacks.append(callback)
+
+def _notify_listeners(agent_system, agent_name, message, metadata=None):
+    """notify_listeners implementation bound onto patched agent systems"""
+    logger.info("Notifying listeners of response from %s", agent_name)
+    for callback in agent_system._listener_callbacks:
+        callback(agent_name, message, metadata)
+
+def _patched_generate_reply(self, *args, **kwargs):
+    """generate_reply replacement shared by all patched agents, bound with functools.partial"""
+    # Call the original method with the original arguments
+    result = self._capture_orig_reply(*args, **kwargs)
+    
+    # Notify listeners with the result
+    if result:
+        content = result.get("content", "") if type(result) is dict else result
+        self._capture_system.notify_listeners(self._capture_agent_name, content)
+    
+    return result
+
+# UI metadata attached to the captured result of each MongoDB function
+_FUNCTION_METADATA = {
+    "explore_mongodb": {"mongodb_type": "exploration"},
+    "get_exploration_notes": {"mongodb_type": "exploration_notes"},
+    "create_visualization": {"mongodb_type": "visualization"},
+}
+
+def _patched_execute_function(user_proxy, function_name, **kwargs):
+    """execute_function replacement for the user proxy, bound with functools.partial"""
+    result = user_proxy._capture_orig_execute(function_name, **kwargs)
+    
+    # Create appropriate metadata based on function name; copied so listeners can't alter the table
+    metadata = _FUNCTION_METADATA.get(function_name)
+    if metadata is not None:
+        metadata = dict(metadata)
+    
+    if function_name == 'execute_query' or function_name == 'execute_aggregation':
+        # Check if the result contains a data table; this is just metadata for the UI
+        if isinstance(result, str) and ("Query returned" in result or "Aggregation returned" in result):
+            metadata = {"mongodb_type": "query_result"}
+    
+    # Notify listeners with the result and metadata
+    user_proxy._capture_system.notify_listeners("MongoDBUserProxy", result, metadata)
+    
+    return result
+
 # Function to patch an existing MongoDB agent system instance
 def patch_agent_system(agent_system):
     """
@@ -253,7 +423,8 @@ def patch_agent_system(agent_system):
         agent_system: The MongoDBAgentSystem instance to patch
         
     Returns:
-        The patched agent system
+        The agent system. It is also returned, possibly only partly patched, when
+        patching fails; the failure is logged rather than signalled to the caller.
     """
     try:
         logger.info("Patching MongoDB agent system for response capture")
@@ -263,24 +434,21 @@ def patch_agent_system(agent_system):
             agent_system.response_listeners = []
             logger.info("Added response_listeners attribute")
         
+        # Dispatch callables are resolved once per listener, at registration time
+        if not hasattr(agent_system, '_listener_callbacks'):
+            agent_system._listener_callbacks = [
+                callback for callback in map(_listener_callback, agent_system.response_listeners)
+                if callback is not None
+            ]
+        
         # Add the add_response_listener method if it doesn't exist
         if not hasattr(agent_system, 'add_response_listener'):
-            def add_response_listener(self, listener):
-                self.response_listeners.append(listener)
-                logger.info(f"Added response listener: {type(listener).__name__}")
-            agent_system.add_response_listener = types.MethodType(add_response_listener, agent_system)
+            agent_system.add_response_listener = functools.partial(_add_response_listener, agent_system)
             logger.info("Added add_response_listener method")
         
         # Add the notify_listeners method if it doesn't exist
         if not hasattr(agent_system, 'notify_listeners'):
-            def notify_listeners(self, agent_name, message, metadata=None):
-                logger.info(f"Notifying listeners of response from {agent_name}")
-                for listener in self.response_listeners:
-                    if hasattr(listener, 'on_response'):
-                        listener.on_response(agent_name, message, metadata)
-                    elif callable(listener):
-                        listener(agent_name, message, metadata)
-            agent_system.notify_listeners = types.MethodType(notify_listeners, agent_system)
+            agent_system.notify_listeners = functools.partial(_notify_listeners, agent_system)
             logger.info("Added notify_listeners method")
         
         # Patch agent message handling if not already patched
@@ -291,27 +459,13 @@ def patch_agent_system(agent_system):
             # Patch MongoDB agents
             if hasattr(agent_system, 'agents'):
                 for agent_name, agent in agent_system.agents.items():
-                    logger.info(f"Patching agent: {agent_name}")
-                    
                     # Patch the generate_reply method if it exists
                     if hasattr(agent, 'generate_reply'):
-                        original_method = agent.generate_reply
-                        
-                        def create_patched_method(agent_name, orig_method):
-                            def patched_method(self, *args, **kwargs):
-                                # Call the original method with the original arguments
-                                result = orig_method(*args, **kwargs)
-                                
-                                # Notify listeners with the result
-                                if result:
-                                    content = result.get("content", "") if isinstance(result, dict) else result
-                                    agent_system.notify_listeners(agent_name, content)
-                                
-                                return result
-                            return types.MethodType(patched_method, agent)
-                        
-                        agent.generate_reply = create_patched_method(agent_name, original_method)
-                        logger.info(f"Patched generate_reply method for {agent_name}")
+                        agent._capture_orig_reply = agent.generate_reply
+                        agent._capture_agent_name = agent_name
+                        agent._capture_system = agent_system
+                        agent.generate_reply = functools.partial(_patched_generate_reply, agent)
+                        logger.info("Patched generate_reply method for %s", agent_name)
             
             # Patch the user proxy agent
             if hasattr(agent_system, 'user_proxy'):
@@ -319,46 +473,15 @@ def patch_agent_system(agent_system):
                 
                 # Patch the execute_function method to capture MongoDB-specific outputs
                 if hasattr(agent_system.user_proxy, 'execute_function'):
-                    original_method = agent_system.user_proxy.execute_function
-                    
-                    def patched_execute_function(self, function_name, **kwargs):
-                        result = original_method(function_name, **kwargs)
-                        
-                        # Create appropriate metadata based on function name
-                        metadata = None
-                        
-                        if function_name == 'execute_query' or function_name == 'execute_aggregation':
-                            # Try to convert the result to a DataFrame if it's a string representing query results
-                            try:
-                                # Check if the result contains a data table
-                                if "Query returned" in result or "Aggregation returned" in result:
-                                    # This is just metadata for UI, not actually converting the data
-                                    metadata = {"mongodb_type": "query_result"}
-                            except:
-                                pass
-                        
-                        elif function_name == 'explore_mongodb':
-                            metadata = {"mongodb_type": "exploration"}
-                            
-                        elif function_name == 'get_exploration_notes':
-                            metadata = {"mongodb_type": "exploration_notes"}
-                            
-                        elif function_name == 'create_visualization':
-                            metadata = {"mongodb_type": "visualization"}
-                            
-                        # Notify listeners with the result and metadata
-                        agent_system.notify_listeners("MongoDBUserProxy", result, metadata)
-                        
-                        return result
-                    
-                    agent_system.user_proxy.execute_function = types.MethodType(patched_execute_function, agent_system.user_proxy)
+                    user_proxy = agent_system.user_proxy
+                    user_proxy._capture_orig_execute = user_proxy.execute_function
+                    user_proxy._capture_system = agent_system
+                    user_proxy.execute_function = functools.partial(_patched_execute_function, user_proxy)
                     logger.info("Patched execute_function method for MongoDB user proxy")
         
         logger.info("Successfully patched MongoDB agent system")
         return agent_system
         
-    except Exception as e:
-        error_msg = f"Error patching MongoDB agent system: {str(e)}"
-        logger.error(error_msg)
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Error patching MongoDB agent system")
         return agent_system
\ No newline at end of file
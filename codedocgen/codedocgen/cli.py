@@ -7,36 +7,174 @@ import os
 import sys
 import argparse
 import logging
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Iterable
+import copy
 import time
+from functools import lru_cache
 from pathlib import Path
 
-os.environ["AUTOGEN_USE_DOCKER"] = "False"
+_colorama = None
 
-from colorama import Fore, Style, init as colorama_init
 
-from codedocgen.config import (
-    get_config, 
-    interactive_configuration, 
-    print_current_config,
-    get_config_file_path
-)
-from codedocgen.code_doc_generator import CodeDocumentationGenerator
+class _NoColor:
+    """Stand-in for colorama's Fore/Style that yields empty codes."""
+    
+    def __getattr__(self, name: str) -> str:
+        return ""
+
+
+def _get_colorama():
+    """
+    Import and initialize colorama on first use.
+    
+    Returns:
+        Tuple of colorama's (Fore, Style)
+    """
+    global _colorama
+    if _colorama is None:
+        if not sys.stdout.isatty():
+            # colorama would strip the codes anyway when output is redirected
+            _colorama = (_NoColor(), _NoColor())
+        else:
+            from colorama import Fore, Style, init as colorama_init
+            
+            # Initialize colorama for cross-platform colored terminal text
+            colorama_init()
+            _colorama = (Fore, Style)
+    return _colorama
+
+
+def _configure_logging() -> None:
+    """Configure logging for commands that load the generator or config modules."""
+    # Runs before those modules' own basicConfig calls, so this format wins
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+
+@lru_cache(maxsize=1)
+def _get_config() -> dict:
+    """Load the configuration file once per process."""
+    from codedocgen.config import get_config
+    return get_config()
+
+
+@lru_cache(maxsize=1)
+def _get_banner() -> str:
+    """Build the colored application banner once."""
+    Fore, Style = _get_colorama()
+    return "\n".join([
+        f"\n{Fore.CYAN}╔══════════════════════════════════════════════╗{Style.RESET_ALL}",
+        f"{Fore.CYAN}║ {Fore.WHITE}CodeDocGen - Code Documentation Generator{Fore.CYAN}    ║{Style.RESET_ALL}",
+        f"{Fore.CYAN}╚══════════════════════════════════════════════╝{Style.RESET_ALL}",
+        f"{Fore.YELLOW}Powered by AutoGen and Ollama{Style.RESET_ALL}\n",
+    ])
 
-# Initialize colorama for cross-platform colored terminal text
-colorama_init()
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(message)s')
-logger = logging.getLogger("codedocgen.cli")
+@lru_cache(maxsize=1)
+def _get_color_map() -> Dict[str, str]:
+    """Map color names accepted by print_color to colorama codes."""
+    Fore, _ = _get_colorama()
+    return {
+        'red': Fore.RED,
+        'green': Fore.GREEN,
+        'yellow': Fore.YELLOW,
+        'blue': Fore.BLUE,
+        'magenta': Fore.MAGENTA,
+        'cyan': Fore.CYAN,
+        'white': Fore.WHITE,
+    }
 
 
 def show_banner() -> None:
     """Display the application banner."""
-    print(f"\n{Fore.CYAN}╔══════════════════════════════════════════════╗{Style.RESET_ALL}")
-    print(f"{Fore.CYAN}║ {Fore.WHITE}CodeDocGen - Code Documentation Generator{Fore.CYAN}    ║{Style.RESET_ALL}")
-    print(f"{Fore.CYAN}╚══════════════════════════════════════════════╝{Style.RESET_ALL}")
-    print(f"{Fore.YELLOW}Powered by AutoGen and Ollama{Style.RESET_ALL}\n")
+    print(_get_banner())
+
+
+# (argument attribute, config key, optional converter) for simple 'run' overrides
+_CONFIG_OVERRIDES = (
+    ("model", "model", None),
+    ("port", "port", None),
+    ("format", "output_format", None),
+    ("max_size", "max_file_size", lambda kb: kb * 1024),  # Convert KB to bytes
+    ("timeout", "timeout", None),
+    ("concurrency", "concurrency", None),
+    ("use_autogen", "use_autogen", None),
+    ("ollama_parallel", "ollama_parallel", None),
+    ("ollama_url", "ollama_urls", None),
+    ("chunk_large_files", "chunk_large_files", None),
+)
+
+
+# Provider -> function returning its API key from the config
+_API_KEY_FETCHERS = {
+    "openai": lambda config: config.get("openai_api_key", ""),
+    "ollama": lambda config: "",
+}
+
+# Providers that cannot run without an API key
+_REQUIRED_KEYS = frozenset({"openai"})
+
+
+def _get_api_key(config: dict) -> Optional[str]:
+    """
+    Get the API key for the configured provider.
+    
+    Args:
+        config: Configuration dictionary
+        
+    Returns:
+        The API key ("" if the provider needs none), or None if a required key is missing
+    """
+    provider = config.get("provider", "ollama")
+    api_key = _API_KEY_FETCHERS.get(provider, _API_KEY_FETCHERS["ollama"])(config)
+    if not api_key and provider in _REQUIRED_KEYS:
+        return None
+    return api_key
+
+
+def _build_generator(config: dict, *, directory: str, output_dir: Optional[str],
+                     verbose: bool, excludes: Optional[Iterable[str]] = None):
+    """
+    Create a CodeDocumentationGenerator from the loaded configuration.
+    
+    Args:
+        config: Configuration dictionary
+        directory: Directory to document
+        output_dir: Output directory for documentation
+        verbose: Enable verbose output
+        excludes: Directories or files to exclude
+        
+    Returns:
+        The generator, or None if the provider's API key is not set
+    """
+    # Set before AutoGen is imported so it never tries to use Docker
+    os.environ.setdefault("AUTOGEN_USE_DOCKER", "False")
+    from codedocgen.code_doc_generator import CodeDocumentationGenerator
+    
+    api_key = _get_api_key(config)
+    if api_key is None:
+        print_color("OpenAI API key is not set. Please run 'codedocgen settings' to configure.", 'red')
+        return None
+    
+    return CodeDocumentationGenerator(
+        directory=directory,
+        model=config.get("model", "mistral"),
+        output_format=config.get("output_format", "markdown"),
+        excludes=excludes,
+        max_file_size=config.get("max_file_size", 500 * 1024),
+        include_extensions=config.get("include_extensions"),
+        output_dir=output_dir,
+        verbose=verbose,
+        timeout=config.get("timeout", 60),
+        ollama_base_url=f"http://localhost:{config.get('port', 11434)}",
+        provider=config.get("provider", "ollama"),
+        api_key=api_key,
+        concurrency=config.get("concurrency", 1),
+        use_cache=config.get("use_cache", True),
+        use_autogen=config.get("use_autogen", False),
+        ollama_parallel=config.get("ollama_parallel"),
+        ollama_base_urls=config.get("ollama_urls") or None,
+        chunk_large_files=config.get("chunk_large_files", False)
+    )
 
 
 def command_settings(args: argparse.Namespace) -> int:
@@ -49,6 +187,10 @@ def command_settings(args: argparse.Namespace) -> int:
     Returns:
         Exit code (0 for success)
     """
+    _configure_logging()
+    from codedocgen.config import interactive_configuration, print_current_config, get_config_file_path
+    
+    Fore, Style = _get_colorama()
     show_banner()
     
     if args.show:
@@ -65,7 +207,8 @@ def command_settings(args: argparse.Namespace) -> int:
             print(f"{Fore.YELLOW}No configuration file found to reset.{Style.RESET_ALL}")
         
         # Load the default config
-        get_config()
+        _get_config.cache_clear()
+        _get_config()
         return 0
     
     # Interactive configuration
@@ -83,46 +226,43 @@ def command_run(args: argparse.Namespace) -> int:
     Returns:
         Exit code (0 for success, non-zero for failure)
     """
+    _configure_logging()
+    Fore, Style = _get_colorama()
     show_banner()
     
-    # Get working directory
-    directory = args.directory or os.getcwd()
-    directory = os.path.abspath(directory)
+    # Resolve the working directory and the current directory once
+    cwd = Path.cwd()
+    base = Path(args.directory).resolve() if args.directory else cwd
+    directory = str(base)
     
     print(f"{Fore.WHITE}Generating documentation for: {Fore.GREEN}{directory}{Style.RESET_ALL}")
     
     # Load configuration
-    config = get_config()
+    config = copy.deepcopy(_get_config())
     
     # Override config with command line arguments if provided
-    if args.model:
-        config["model"] = args.model
-    
-    if args.port:
-        config["port"] = args.port
-        
-    if args.format:
-        config["output_format"] = args.format
-        
-    if args.max_size:
-        config["max_file_size"] = args.max_size * 1024  # Convert KB to bytes
-        
-    if args.timeout:
-        config["timeout"] = args.timeout
+    for attr, key, convert in _CONFIG_OVERRIDES:
+        value = getattr(args, attr, None)
+        if value:
+            config[key] = convert(value) if convert else value
+    if args.use_cache is not None:
+        config["use_cache"] = args.use_cache
         
+    # Keep excludes as sets so merging and de-duplication are O(1) per entry
+    config["exclude_dirs"] = set(config.get("exclude_dirs", []))
+    config["exclude_files"] = set(config.get("exclude_files", []))
+    
     if args.exclude:
         # Append to existing excludes
         for exclude in args.exclude:
-            if os.path.isdir(os.path.join(directory, exclude)):
-                if exclude not in config["exclude_dirs"]:
-                    config["exclude_dirs"].append(exclude)
+            if (base / exclude).is_dir():
+                config["exclude_dirs"].add(exclude)
             else:
-                if exclude not in config["exclude_files"]:
-                    config["exclude_files"].append(exclude)
+                config["exclude_files"].add(exclude)
     
     if args.extensions:
-        # Convert extensions to proper format
-        extensions = [ext if ext.startswith('.') else f'.{ext}' for ext in args.extensions]
+        # Convert extensions to proper format, dropping duplicates but keeping order
+        extensions = list(dict.fromkeys('.' + ext.lstrip('.') for ext in args.extensions))
         config["include_extensions"] = extensions
         
     if args.output:
@@ -131,36 +271,16 @@ def command_run(args: argparse.Namespace) -> int:
         # Use a subdirectory of the current directory
         output_dir = os.path.join(directory, "code_docs")
     
-    # Configure Ollama base URL
-    ollama_base_url = f"http://localhost:{config['port']}"
-    
     try:
-        # Initialize the generator
-        # Update this part in command_run function in cli.py
-
-# Get the API key based on provider
-        api_key = ""
-        if config.get("provider") == "openai":
-            api_key = config.get("openai_api_key", "")
-            if not api_key:
-                print(f"{Fore.RED}OpenAI API key is not set. Please run 'codedocgen settings' to configure.{Style.RESET_ALL}")
-                return 1
-
-        # Initialize the generator
-        generator = CodeDocumentationGenerator(
+        generator = _build_generator(
+            config,
             directory=directory,
-            model=config["model"],
-            output_format=config["output_format"],
-            excludes=config["exclude_dirs"] + config["exclude_files"],
-            max_file_size=config["max_file_size"],
-            include_extensions=config.get("include_extensions"),
             output_dir=output_dir,
             verbose=args.verbose,
-            timeout=config["timeout"],
-            ollama_base_url=ollama_base_url,
-            provider=config.get("provider", "ollama"),
-            api_key=api_key  # Pass the correct API key
+            excludes=frozenset(config["exclude_dirs"] | config["exclude_files"])
         )
+        if generator is None:
+            return 1
         
         # Run the documentation generation
         print(f"{Fore.YELLOW}Starting documentation generation...{Style.RESET_ALL}")
@@ -172,16 +292,26 @@ def command_run(args: argparse.Namespace) -> int:
         
         # Output results
         if result["status"] == "completed":
-            print(f"\n{Fore.GREEN}✅ Documentation generation completed in {elapsed_time:.2f} seconds{Style.RESET_ALL}")
-            print(f"{Fore.WHITE}📊 Processed {result['stats']['total_files_processed']} files{Style.RESET_ALL}")
-            print(f"{Fore.WHITE}📁 Documentation saved to: {Fore.GREEN}{output_dir}{Style.RESET_ALL}")
+            lines = [
+                f"\n{Fore.GREEN}✅ Documentation generation completed in {elapsed_time:.2f} seconds{Style.RESET_ALL}",
+                f"{Fore.WHITE}📊 Processed {result['stats']['total_files_processed']} files{Style.RESET_ALL}",
+                f"{Fore.WHITE}📁 Documentation saved to: {Fore.GREEN}{output_dir}{Style.RESET_ALL}",
+            ]
             
             if result.get("index_file"):
-                rel_index = os.path.relpath(result['index_file'], os.getcwd())
-                print(f"{Fore.WHITE}📑 Index file: {Fore.GREEN}{rel_index}{Style.RESET_ALL}")
+                index_file = Path(result['index_file']).resolve()
+                try:
+                    rel_index = index_file.relative_to(cwd)
+                except ValueError:
+                    rel_index = index_file
+                lines.append(f"{Fore.WHITE}📑 Index file: {Fore.GREEN}{rel_index}{Style.RESET_ALL}")
+            
+            if result["stats"].get("error_count"):
+                lines.append(f"{Fore.YELLOW}⚠️ Encountered {result['stats']['error_count']} errors during processing{Style.RESET_ALL}")
             
-            if result["stats"].get("errors") and len(result["stats"]["errors"]) > 0:
-                print(f"{Fore.YELLOW}⚠️ Encountered {len(result['stats']['errors'])} errors during processing{Style.RESET_ALL}")
+            # Emit the whole report in a single write
+            sys.stdout.write("\n".join(lines) + "\n")
+            sys.stdout.flush()
                 
             return 0
         else:
@@ -201,71 +331,63 @@ def print_color(text: str, color: str) -> None:
         text: The text to print
         color: Color name ('red', 'green', 'yellow', etc.)
     """
-    color_map = {
-        'red': Fore.RED,
-        'green': Fore.GREEN,
-        'yellow': Fore.YELLOW,
-        'blue': Fore.BLUE,
-        'magenta': Fore.MAGENTA,
-        'cyan': Fore.CYAN,
-        'white': Fore.WHITE,
-    }
-    color_code = color_map.get(color.lower(), Fore.WHITE)
+    Fore, Style = _get_colorama()
+    color_code = _get_color_map().get(color.lower(), Fore.WHITE)
     print(f"{color_code}{text}{Style.RESET_ALL}")
 
 
+_SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+
+
 def format_size(size_bytes: int) -> str:
     """Format file size in bytes to a human-readable string."""
-    for unit in ['B', 'KB', 'MB', 'GB']:
-        if size_bytes < 1024 or unit == 'GB':
-            return f"{size_bytes:.2f} {unit}"
-        size_bytes /= 1024
+    if size_bytes < 1024:
+        return f"{size_bytes:.2f} B"
+    # Each unit is 2**10 times the previous one, so the bit length picks it directly
+    i = min((int(size_bytes).bit_length() - 1) // 10, len(_SIZE_UNITS) - 1)
+    return f"{size_bytes / (1 << (10 * i)):.2f} {_SIZE_UNITS[i]}"
 
 
 def command_generate(args):
     """Handle the generate command."""
+    _configure_logging()
+    Fore, Style = _get_colorama()
     try:
         # Load configuration
-        config = get_config()
-        
-        # Get the API key based on provider
-        api_key = ""
-        if config.get("provider") == "openai":
-            api_key = config.get("openai_api_key", "")
-            if not api_key:
-                print(f"{Fore.RED}OpenAI API key is not set. Please run 'codedocgen settings' to configure.{Style.RESET_ALL}")
-                return 1
+        config = copy.deepcopy(_get_config())
         
         # Setup the documentation generator
-        generator = CodeDocumentationGenerator(
+        generator = _build_generator(
+            config,
             directory=args.directory,
-            provider=config.get("provider", "ollama"),
-            api_key=api_key,
-            model=config.get("model", "mistral"),
-            output_format=config.get("output_format", "markdown"),
-            max_file_size=config.get("max_file_size", 500 * 1024),
-            timeout=config.get("timeout", 60),
-            verbose=args.verbose,
             output_dir=args.output,
-            ollama_base_url=f"http://localhost:{config.get('port', 11434)}"
+            verbose=args.verbose
         )
+        if generator is None:
+            return 1
         
         # Run the generation process
         results = generator.run()
         
         # Print results summary
         if results["status"] == "completed":
-            print_color(results["message"], 'green')
-            print(f"Documentation index: {results['index_file']}")
-            print(f"Files processed: {results['stats']['total_files_processed']}")
-            print(f"Files skipped: {results['stats']['total_files_skipped']}")
-            print(f"Total code size: {format_size(results['stats']['total_bytes_processed'])}")
+            lines = [
+                f"{Fore.GREEN}{results['message']}{Style.RESET_ALL}",
+                f"Documentation index: {results['index_file']}",
+                f"Files processed: {results['stats']['total_files_processed']}",
+                f"Files skipped: {results['stats']['total_files_skipped']}",
+                f"Total code size: {format_size(results['stats']['total_bytes_processed'])}",
+            ]
             
-            if results['stats']['errors']:
-                print_color(f"Errors encountered: {len(results['stats']['errors'])}", 'yellow')
+            if results['stats']['error_count']:
+                lines.append(f"{Fore.YELLOW}Errors encountered: {results['stats']['error_count']}{Style.RESET_ALL}")
                 if args.verbose:
                     for error in results['stats']['errors']:
-                        print_color(f"  - {error['file']}: {error['error']}", 'yellow')
+                        lines.append(f"{Fore.YELLOW}  - {error['file']}: {error['error']}{Style.RESET_ALL}")
+            
+            # Emit the whole summary in a single write
+            sys.stdout.write("\n".join(lines) + "\n")
+            sys.stdout.flush()
             
             return 0
         else:
@@ -280,6 +402,63 @@ def command_generate(args):
         return 1
 
 
+def _print_version() -> int:
+    """Print the installed CodeDocGen version."""
+    from codedocgen import __version__
+    print(f"CodeDocGen version {__version__}")
+    return 0
+
+
+def _build_settings_parser(subparsers) -> None:
+    """Register the 'settings' command."""
+    settings_parser = subparsers.add_parser("settings", help="Configure application settings")
+    settings_parser.add_argument("--show", action="store_true", help="Show current settings")
+    settings_parser.add_argument("--reset", action="store_true", help="Reset settings to defaults")
+
+
+def _build_run_parser(subparsers) -> None:
+    """Register the 'run' command."""
+    run_parser = subparsers.add_parser("run", help="Generate documentation")
+    run_parser.add_argument("directory", nargs="?", help="Directory to scan (default: current directory)")
+    run_parser.add_argument("--model", help="Ollama model to use (overrides config)")
+    run_parser.add_argument("--port", type=int, help="Ollama API port (overrides config)")
+    run_parser.add_argument("--format", choices=["markdown", "html", "json"], 
+                         help="Output format (overrides config)")
+    run_parser.add_argument("--output", help="Output directory for documentation")
+    run_parser.add_argument("--exclude", nargs="+", help="Directories or files to exclude")
+    run_parser.add_argument("--max-size", type=int, 
+                         help="Maximum file size in KB to process (overrides config)")
+    run_parser.add_argument("--chunk-large-files", action="store_true",
+                         help="Document files over the size limit in chunks instead of skipping them")
+    run_parser.add_argument("--extensions", nargs="+", 
+                         help="File extensions to include (e.g., py js ts)")
+    run_parser.add_argument("--timeout", type=int,
+                         help="Timeout for API calls in seconds (overrides config)")
+    run_parser.add_argument("--concurrency", type=int,
+                         help="Number of files to document in parallel (overrides config)")
+    run_parser.add_argument("--ollama-url", nargs="+",
+                         help="Ollama base URLs to spread requests across (overrides --port)")
+    run_parser.add_argument("--ollama-parallel", type=int,
+                         help="Maximum concurrent Ollama requests; match the server's OLLAMA_NUM_PARALLEL")
+    run_parser.add_argument("--no-cache", dest="use_cache", action="store_false", default=None,
+                         help="Ignore cached model responses and regenerate every file")
+    run_parser.add_argument("--use-autogen", action="store_true",
+                         help="Send requests through AutoGen agents instead of the model API directly")
+    run_parser.add_argument("--verbose", action="store_true", help="Enable verbose output")
+
+
+def _build_version_parser(subparsers) -> None:
+    """Register the 'version' command."""
+    subparsers.add_parser("version", help="Show version information")
+
+
+_SUBPARSER_BUILDERS = {
+    "settings": _build_settings_parser,
+    "run": _build_run_parser,
+    "version": _build_version_parser,
+}
+
+
 def main(args: Optional[List[str]] = None) -> int:
     """
     Main entry point for the CLI.
@@ -290,6 +469,12 @@ def main(args: Optional[List[str]] = None) -> int:
     Returns:
         Exit code
     """
+    argv = sys.argv[1:] if args is None else args
+    
+    # 'version' takes no options, so answer it without building a parser
+    if argv == ["version"]:
+        return _print_version()
+    
     parser = argparse.ArgumentParser(
         description="CodeDocGen - Code Documentation Generator using AutoGen and Ollama",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -305,30 +490,13 @@ Examples:
     # Create subparsers for commands
     subparsers = parser.add_subparsers(dest="command", help="Command to execute")
     
-    # Settings command
-    settings_parser = subparsers.add_parser("settings", help="Configure application settings")
-    settings_parser.add_argument("--show", action="store_true", help="Show current settings")
-    settings_parser.add_argument("--reset", action="store_true", help="Reset settings to defaults")
-    
-    # Run command
-    run_parser = subparsers.add_parser("run", help="Generate documentation")
-    run_parser.add_argument("directory", nargs="?", help="Directory to scan (default: current directory)")
-    run_parser.add_argument("--model", help="Ollama model to use (overrides config)")
-    run_parser.add_argument("--port", type=int, help="Ollama API port (overrides config)")
-    run_parser.add_argument("--format", choices=["markdown", "html", "json"], 
-                         help="Output format (overrides config)")
-    run_parser.add_argument("--output", help="Output directory for documentation")
-    run_parser.add_argument("--exclude", nargs="+", help="Directories or files to exclude")
-    run_parser.add_argument("--max-size", type=int, 
-                         help="Maximum file size in KB to process (overrides config)")
-    run_parser.add_argument("--extensions", nargs="+", 
-                         help="File extensions to include (e.g., py js ts)")
-    run_parser.add_argument("--timeout", type=int,
-                         help="Timeout for API calls in seconds (overrides config)")
-    run_parser.add_argument("--verbose", action="store_true", help="Enable verbose output")
-    
-    # Version command
-    version_parser = subparsers.add_parser("version", help="Show version information")
+    # Only build the subparser that will be used; build them all for help or errors
+    command = argv[0] if argv else None
+    if command in _SUBPARSER_BUILDERS:
+        _SUBPARSER_BUILDERS[command](subparsers)
+    else:
+        for build in _SUBPARSER_BUILDERS.values():
+            build(subparsers)
     
     # Parse arguments
     parsed_args = parser.parse_args(args)
@@ -339,9 +507,7 @@ Examples:
     elif parsed_args.command == "run":
         return command_run(parsed_args)
     elif parsed_args.command == "version":
-        from codedocgen import __version__
-        print(f"CodeDocGen version {__version__}")
-        return 0
+        return _print_version()
     else:
         # No command specified, show help
         parser.print_help()
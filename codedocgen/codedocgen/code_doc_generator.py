@@ -12,24 +12,35 @@ import os
 import sys
 import time
 import json
+import hashlib
 import logging
 import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from itertools import count
 from pathlib import Path
-from typing import Dict, List, Set, Tuple, Optional, Union, Any
+from typing import Dict, List, Set, Tuple, Optional, Union, Any, Iterator, Generator
 import mimetypes
 import importlib.util
 
 from codedocgen.utils import format_size
 
 try:
-    import autogen
-    from autogen import AssistantAgent
+    import requests
+    from requests.adapters import HTTPAdapter
 except ImportError:
     print("Error: Required packages not installed.")
     print("Please install the required packages using:")
-    print("pip install pyautogen requests")
+    print("pip install requests")
     sys.exit(1)
 
+# orjson is optional; it is several times faster than the json module for cache and index files
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -41,6 +52,110 @@ logging.basicConfig(
 )
 logger = logging.getLogger("CodeDocGen")
 
+
+def _json_dumps(obj: Any, indent: bool = False) -> str:
+    """Serialize obj to a JSON string, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0).decode('utf-8')
+    return json.dumps(obj, indent=2 if indent else None)
+
+
+def _json_loads(data: Union[str, bytes]) -> Any:
+    """Parse JSON text or bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _write_text(path: str, content: str) -> None:
+    """
+    Write text to a file as UTF-8 with a single write call.
+    
+    Encoding up front and writing bytes lets the whole document go to the OS in
+    one write instead of through the text layer's chunked encoder.
+    
+    Args:
+        path: File to create or overwrite
+        content: Text to write
+    """
+    data = content.encode('utf-8', errors='replace')
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def _read_text(path: str) -> str:
+    """
+    Read a whole text file as UTF-8, replacing undecodable bytes.
+    
+    The file is read unbuffered with a single readall(), which sizes its buffer
+    from fstat, and line endings are normalised as text mode would.
+    
+    Args:
+        path: File to read
+        
+    Returns:
+        File content with newline-normalised line endings
+    """
+    with open(path, 'rb', buffering=0) as f:
+        text = f.read().decode('utf-8', errors='replace')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+# Blank line followed by unindented code: a boundary between top-level declarations
+_TOP_LEVEL_BREAK = re.compile(r'\n\n(?=\S)')
+
+
+def _chunk_code(content: str, max_bytes: int) -> List[str]:
+    """
+    Split code into chunks of at most max_bytes, preferring top-level boundaries.
+    
+    Args:
+        content: Code to split
+        max_bytes: Maximum UTF-8 size of a chunk
+        
+    Returns:
+        List of consecutive chunks covering the whole content
+    """
+    chunks = []
+    current = []
+    current_size = 0
+    
+    def flush():
+        nonlocal current, current_size
+        if current:
+            chunks.append("".join(current))
+            current, current_size = [], 0
+    
+    # Keep the separator with the preceding block so chunks concatenate back to content
+    blocks = _TOP_LEVEL_BREAK.split(content)
+    for i, block in enumerate(blocks):
+        if i < len(blocks) - 1:
+            block += "\n\n"
+        size = len(block.encode('utf-8', errors='replace'))
+        
+        if size > max_bytes:
+            # A single oversized declaration is split on line boundaries
+            flush()
+            for line in block.splitlines(keepends=True):
+                line_size = len(line.encode('utf-8', errors='replace'))
+                if current_size + line_size > max_bytes:
+                    flush()
+                current.append(line)
+                current_size += line_size
+            flush()
+            continue
+        
+        if current_size + size > max_bytes:
+            flush()
+        current.append(block)
+        current_size += size
+    
+    flush()
+    return chunks
+
+
 # File type patterns
 CODE_FILE_EXTENSIONS = {
     '.py': 'Python',
@@ -94,6 +209,68 @@ DEFAULT_EXCLUDE_FILES = {
     '.env.test', '.env.production'
 }
 
+# System prompt given to the documentation model
+SYSTEM_PROMPT = """
+            You are an expert code documentation assistant. Your task is to:
+            1. Analyze code files and understand their structure
+            2. Generate comprehensive documentation explaining:
+            - Overall purpose of the file
+            - Key functions, classes, and methods
+            - Important dependencies and logic flow
+            - Usage examples where appropriate
+            3. Format documentation clearly and professionally
+            4. Focus on accuracy and clarity in your documentation
+            
+            When documenting code, always include:
+            - File purpose overview
+            - Class and function descriptions
+            - Parameter explanations
+            - Return value descriptions
+            - Example usage where helpful
+            """
+
+# OpenAI chat completions endpoint used by the direct HTTP client
+OPENAI_CHAT_URL = "https://api.openai.com/v1/chat/completions"
+
+# Output format -> documentation file extension
+OUTPUT_EXTENSIONS = {
+    "markdown": ".md",
+    "html": ".html",
+    "json": ".json",
+}
+
+# File info appended to markdown documentation, filled with str.format_map
+MARKDOWN_FOOTER_TEMPLATE = "\n\n---\n**File**: `{file_path}`  \n**Language**: {language}  \n**Generated**: {generated}"
+
+# Page wrapper for HTML documentation, filled with str.format_map
+HTML_DOC_TEMPLATE = """<!DOCTYPE html>
+                <html>
+                <head>
+                    <title>Documentation: {file_path}</title>
+                    <meta charset="utf-8">
+                    <style>
+                        body {{ font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, Helvetica, Arial, sans-serif; line-height: 1.6; padding: 20px; max-width: 900px; margin: 0 auto; color: #333; }}
+                        pre {{ background-color: #f5f5f5; padding: 10px; border-radius: 5px; overflow-x: auto; }}
+                        code {{ font-family: "SFMono-Regular", Consolas, "Liberation Mono", Menlo, monospace; }}
+                        h1, h2, h3 {{ color: #222; }}
+                        .file-info {{ font-size: 0.9em; color: #555; border-top: 1px solid #eee; margin-top: 30px; padding-top: 10px; }}
+                    </style>
+                </head>
+                <body>
+                    <h1>Documentation: {name}</h1>
+                    {html_content}
+                    <div class="file-info">
+                        <p><strong>File:</strong> {file_path}<br>
+                        <strong>Language:</strong> {language}<br>
+                        <strong>Generated:</strong> {generated}</p>
+                    </div>
+                </body>
+                </html>
+                """
+
+# Subdirectory of the output directory holding cached model responses
+CACHE_DIR_NAME = ".cache"
+
 class CodeDocumentationGenerator:
     """Main class for generating code documentation using AutoGen and Ollama."""
     
@@ -112,6 +289,15 @@ class CodeDocumentationGenerator:
         ollama_base_url: str = "http://localhost:11434",
         provider: str = "ollama",
         api_key: str = "",
+        concurrency: int = 1,
+        scan_workers: int = 8,
+        use_cache: bool = True,
+        use_autogen: bool = False,
+        ollama_parallel: Optional[int] = None,
+        ollama_base_urls: Optional[List[str]] = None,
+        endpoint_cooldown: float = 30.0,
+        chunk_large_files: bool = False,
+        max_error_records: int = 200,
     ):
         """
         Initialize the documentation generator.
@@ -130,16 +316,40 @@ class CodeDocumentationGenerator:
             ollama_base_url: Base URL for Ollama API (only used with ollama provider)
             provider: Model provider ('ollama' or 'openai')
             api_key: API key for OpenAI (required if provider is 'openai')
+            concurrency: Number of files to document in parallel
+            scan_workers: Number of threads used to scan large directory trees
+            use_cache: Reuse model responses cached in the output directory for unchanged files
+            use_autogen: Route requests through AutoGen agents instead of calling the model API directly
+            ollama_parallel: Maximum in-flight Ollama requests; should match the server's
+                OLLAMA_NUM_PARALLEL (defaults to that variable, else to concurrency)
+            ollama_base_urls: Several Ollama base URLs to spread requests across (overrides ollama_base_url)
+            endpoint_cooldown: Seconds a failing Ollama endpoint is skipped before being retried
+            chunk_large_files: Document files over max_file_size in chunks instead of skipping them
+            max_error_records: Number of most recent errors kept for the report (all are counted)
         """
         self.directory = os.path.abspath(directory)
         self.model = model
         self.output_format = output_format
         self.max_file_size = max_file_size
+        self.chunk_large_files = chunk_large_files
         self.verbose = verbose
         self.timeout = timeout
         self.ollama_base_url = ollama_base_url
+        self.ollama_base_urls = list(ollama_base_urls or [ollama_base_url])
+        self.endpoint_cooldown = endpoint_cooldown
         self.provider = provider
         self.api_key = api_key
+        self.concurrency = max(1, concurrency)
+        self.scan_workers = scan_workers
+        self.use_cache = use_cache
+        self.use_autogen = use_autogen
+        self.ollama_parallel = max(1, ollama_parallel
+                                   or int(os.environ.get("OLLAMA_NUM_PARALLEL", 0))
+                                   or self.concurrency)
+        
+        # Stats are shared between worker threads; agents are per thread
+        self._stats_lock = threading.Lock()
+        self._local = threading.local()
         
         # Validate provider setting
         if self.provider not in ["ollama", "openai"]:
@@ -152,8 +362,8 @@ class CodeDocumentationGenerator:
         # Load config file if provided
         if config_file and os.path.exists(config_file):
             try:
-                with open(config_file, 'r') as f:
-                    config = json.load(f)
+                with open(config_file, 'rb') as f:
+                    config = _json_loads(f.read())
                     # Update configuration from file
                     for key, value in config.items():
                         if hasattr(self, key) and value is not None:
@@ -162,6 +372,13 @@ class CodeDocumentationGenerator:
             except Exception as e:
                 logger.error(f"Failed to load config file: {e}")
         
+        # On-disk sizes recorded by scan_directory, keyed by file path
+        self._file_sizes = {}
+        
+        # Output subdirectories already created and documentation files written this run
+        self._created_dirs = set()
+        self._written_paths = []
+        
         # Setup exclude patterns
         self.exclude_dirs = DEFAULT_EXCLUDE_DIRS.copy()
         self.exclude_files = DEFAULT_EXCLUDE_FILES.copy()
@@ -179,6 +396,9 @@ class CodeDocumentationGenerator:
                             for ext in include_extensions}
         else:
             self.extensions = CODE_FILE_EXTENSIONS
+        
+        # Lower-cased extension -> language, so scanning needs one lookup per file
+        self._ext_lang = {ext.lower(): lang for ext, lang in self.extensions.items()}
             
         # Output directory setup
         if output_dir:
@@ -187,6 +407,27 @@ class CodeDocumentationGenerator:
         else:
             self.output_dir = os.path.join(self.directory, "code_docs")
             os.makedirs(self.output_dir, exist_ok=True)
+        
+        # Resolve the output format once (after any config file override)
+        self._fmt = self.output_format.lower()
+        self._formatter = {
+            "markdown": self._format_markdown,
+            "html": self._format_html,
+            "json": self._format_json,
+        }.get(self._fmt, self._format_text)
+        self._out_ext = OUTPUT_EXTENSIONS.get(self._fmt, ".txt")
+        
+        # Import markdown once up front; converters are reused per thread by _get_markdown()
+        self._markdown = None
+        if self._fmt == "html":
+            try:
+                import markdown
+                self._markdown = markdown
+            except ImportError:
+                logger.warning("markdown package not found, outputting raw content")
+        
+        # Model responses are cached per prompt so unchanged files skip the LLM on reruns
+        self.cache_dir = os.path.join(self.output_dir, CACHE_DIR_NAME)
             
         # Initialize stats
         self.stats = {
@@ -194,13 +435,17 @@ class CodeDocumentationGenerator:
             "total_files_skipped": 0,
             "total_bytes_processed": 0,
             "language_counts": {},
-            "errors": [],
+            "errors": deque(maxlen=max_error_records),
+            "error_count": 0,
             "start_time": time.time(),
             "end_time": None,
             "duration": None
         }
         
-        # Setup AutoGen agents
+        # Every document generated in a run shares one timestamp
+        self._run_timestamp = time.strftime('%Y-%m-%d %H:%M:%S')
+        
+        # Setup the model client (direct HTTP or AutoGen agents)
         self._setup_agents()
         
         logger.info(f"Initialized CodeDocumentationGenerator for directory: {self.directory}")
@@ -209,72 +454,162 @@ class CodeDocumentationGenerator:
         logger.info(f"Output format: {self.output_format}")
         logger.info(f"Output directory: {self.output_dir}")
 
-    def scan_directory(self) -> List[str]:
+    def _record_error(self, file: str, error: str, error_type: str) -> None:
         """
-        Scan the directory recursively and return a list of code files to process.
+        Count an error and keep it in the bounded list of recent errors.
         
+        Args:
+            file: Path of the file the error relates to
+            error: Error message
+            error_type: Kind of error
+        """
+        with self._stats_lock:
+            self.stats["error_count"] += 1
+            self.stats["errors"].append({
+                "file": file,
+                "error": error,
+                "type": error_type
+            })
+
+    def _scan_one_directory(self, path: str) -> Tuple[List[str], List[Tuple[str, int]], int, Dict[str, int]]:
+        """
+        Scan a single directory without recursing into it.
+        
+        Args:
+            path: Directory to scan
+            
         Returns:
-            List of file paths to be processed
+            Tuple of (subdirectories to scan, (code file, size) pairs, skipped file count, language counts)
         """
+        subdirs = []
         code_files = []
-        skipped_files = []
+        skipped_count = 0
+        language_counts = {}
         
-        try:
-            for root, dirs, files in os.walk(self.directory):
-                # Modify dirs in-place to exclude directories
-                dirs[:] = [d for d in dirs if d not in self.exclude_dirs and not d.startswith('.')]
+        with os.scandir(path) as entries:
+            for entry in entries:
+                name = entry.name
                 
-                # Process files in this directory
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    rel_path = os.path.relpath(file_path, self.directory)
-                    
-                    # Skip excluded files
-                    if file in self.exclude_files or any(rel_path.startswith(d) for d in self.exclude_dirs):
-                        if self.verbose:
-                            logger.debug(f"Skipping excluded file: {rel_path}")
+                if entry.is_dir(follow_symlinks=False):
+                    # Prune excluded (by name or relative path) and hidden directories, and the
+                    # output directory, which run() writes to while the scan is still going
+                    if (name in self.exclude_dirs or name.startswith('.') or
+                            entry.path == self.output_dir or
+                            os.path.relpath(entry.path, self.directory) in self.exclude_dirs):
                         continue
-                    
-                    # Check file extension
-                    _, ext = os.path.splitext(file)
-                    if ext.lower() not in self.extensions:
-                        if self.verbose:
-                            logger.debug(f"Skipping non-code file: {rel_path}")
-                        continue
-                    
-                    # Check file size
-                    try:
-                        file_size = os.path.getsize(file_path)
-                        if file_size > self.max_file_size:
-                            logger.warning(f"Skipping file exceeding max size ({file_size} bytes): {rel_path}")
-                            skipped_files.append({"file": rel_path, "reason": "size_limit", "size": file_size})
-                            self.stats["total_files_skipped"] += 1
-                            continue
-                    except Exception as e:
-                        logger.error(f"Error checking file size for {rel_path}: {e}")
-                        skipped_files.append({"file": rel_path, "reason": "error", "error": str(e)})
-                        self.stats["total_files_skipped"] += 1
+                    subdirs.append(entry.path)
+                    continue
+                
+                if not entry.is_file():
+                    continue
+                
+                # Skip excluded files
+                if name in self.exclude_files:
+                    if self.verbose:
+                        logger.debug(f"Skipping excluded file: {os.path.relpath(entry.path, self.directory)}")
+                    continue
+                
+                # Check file extension
+                lang = self._ext_lang.get(os.path.splitext(name)[1].lower())
+                if lang is None:
+                    if self.verbose:
+                        logger.debug(f"Skipping non-code file: {os.path.relpath(entry.path, self.directory)}")
+                    continue
+                
+                # Check file size
+                try:
+                    file_size = entry.stat().st_size
+                    if file_size > self.max_file_size and not self.chunk_large_files:
+                        rel_path = os.path.relpath(entry.path, self.directory)
+                        logger.warning(f"Skipping file exceeding max size ({file_size} bytes): {rel_path}")
+                        skipped_count += 1
                         continue
-                    
-                    # File is valid, add to list
-                    code_files.append(file_path)
-                    
-                    # Update language stats
-                    lang = self.extensions.get(ext.lower(), "Unknown")
-                    self.stats["language_counts"][lang] = self.stats["language_counts"].get(lang, 0) + 1
+                except Exception as e:
+                    rel_path = os.path.relpath(entry.path, self.directory)
+                    logger.error(f"Error checking file size for {rel_path}: {e}")
+                    skipped_count += 1
+                    continue
+                
+                # File is valid, add to list with the size already read from the entry
+                code_files.append((entry.path, file_size))
+                
+                # Update language stats
+                language_counts[lang] = language_counts.get(lang, 0) + 1
+        
+        return subdirs, code_files, skipped_count, language_counts
+
+    def _merge_scan(self, result) -> Generator[str, None, List[str]]:
+        """
+        Record one directory's scan result and yield its code files.
         
+        Args:
+            result: Tuple returned by _scan_one_directory
+            
+        Yields:
+            Code file paths in the directory
+            
+        Returns:
+            Subdirectories still to be scanned
+        """
+        subdirs, files, skipped, counts = result
+        self.stats["total_files_skipped"] += skipped
+        language_counts = self.stats["language_counts"]
+        for lang, count in counts.items():
+            language_counts[lang] = language_counts.get(lang, 0) + count
+        for file_path, file_size in files:
+            self._file_sizes[file_path] = file_size
+            yield file_path
+        return subdirs
+
+    def iter_code_files(self) -> Iterator[str]:
+        """
+        Scan the directory recursively, yielding code files as they are found.
+        
+        Yields:
+            File paths to be processed, in scan order
+        """
+        pending = yield from self._merge_scan(self._scan_one_directory(self.directory))
+        
+        if self.scan_workers > 1 and len(pending) > 1:
+            # Overlap readdir/stat syscalls across subdirectories
+            with ThreadPoolExecutor(max_workers=self.scan_workers) as executor:
+                futures = {executor.submit(self._scan_one_directory, d) for d in pending}
+                while futures:
+                    done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        subdirs = yield from self._merge_scan(future.result())
+                        for subdir in subdirs:
+                            futures.add(executor.submit(self._scan_one_directory, subdir))
+        else:
+            while pending:
+                subdirs = yield from self._merge_scan(self._scan_one_directory(pending.pop()))
+                pending.extend(subdirs)
+
+    def scan_directory(self) -> List[str]:
+        """
+        Scan the directory recursively and return a list of code files to process.
+        
+        Returns:
+            List of file paths to be processed
+        """
+        skipped_before = self.stats["total_files_skipped"]
+        
+        try:
+            # Parallel scans finish in arbitrary order; keep the file order stable
+            code_files = sorted(self.iter_code_files())
         except Exception as e:
             logger.error(f"Error scanning directory: {e}")
             raise
         
+        skipped = self.stats["total_files_skipped"] - skipped_before
         logger.info(f"Found {len(code_files)} code files to process")
-        if skipped_files:
-            logger.info(f"Skipped {len(skipped_files)} files")
+        if skipped:
+            logger.info(f"Skipped {skipped} files")
         
         return code_files
 
     def _setup_agents(self):
-        """Setup AutoGen agents with Ollama or OpenAI integration."""
+        """Setup the Ollama or OpenAI client, optionally through AutoGen agents."""
         try:
             # Create the correct configuration based on provider
             if self.provider == "ollama":
@@ -309,74 +644,228 @@ class CodeDocumentationGenerator:
             else:
                 raise ValueError(f"Unsupported provider: {self.provider}. Use 'ollama' or 'openai'.")
             
-            # Create an Assistant Agent with the configured LLM
-            self.ollama_agent = autogen.AssistantAgent(
-                name="code_documentation_agent",
-                llm_config=llm_config,
-                system_message="""
-                You are an expert code documentation assistant. Your task is to:
-                1. Analyze code files and understand their structure
-                2. Generate comprehensive documentation explaining:
-                - Overall purpose of the file
-                - Key functions, classes, and methods
-                - Important dependencies and logic flow
-                - Usage examples where appropriate
-                3. Format documentation clearly and professionally
-                4. Focus on accuracy and clarity in your documentation
-                
-                When documenting code, always include:
-                - File purpose overview
-                - Class and function descriptions
-                - Parameter explanations
-                - Return value descriptions
-                - Example usage where helpful
-                """
-            )
-            
-            # Create a user proxy agent for managing interactions - DISABLE DOCKER
-            self.user_proxy = autogen.UserProxyAgent(
-                name="user_proxy",
-                human_input_mode="NEVER",
-                max_consecutive_auto_reply=0,
-                # Disable Docker for code execution
-                code_execution_config={"use_docker": False}
-            )
+            self._llm_config = llm_config
             
-            logger.info("AutoGen agents successfully initialized")
+            if self.use_autogen:
+                # AutoGen has a heavy import graph, so it is only loaded when requested
+                if importlib.util.find_spec("autogen") is None:
+                    print("Error: Required packages not installed.")
+                    print("Please install the required packages using:")
+                    print("pip install pyautogen")
+                    sys.exit(1)
+                self.ollama_agent, self.user_proxy = self._get_agents()
+                logger.info("AutoGen agents successfully initialized")
+            else:
+                # One-shot completions don't need an agent loop; post to the chat endpoint directly
+                if self.provider == "ollama":
+                    # Each endpoint caps its in-flight requests at what the server runs in parallel
+                    self._endpoints = [
+                        {
+                            "url": f"{url.rstrip('/')}/api/chat",
+                            "semaphore": threading.BoundedSemaphore(self.ollama_parallel),
+                            "down_until": 0.0,
+                        }
+                        for url in self.ollama_base_urls
+                    ]
+                    self._endpoint_counter = count()
+                    self._chat_headers = {}
+                    for endpoint in self._endpoints:
+                        logger.info(f"Using direct chat endpoint: {endpoint['url']}")
+                else:
+                    self._chat_url = OPENAI_CHAT_URL
+                    self._chat_headers = {"Authorization": f"Bearer {self.api_key}"}
+                    logger.info(f"Using direct chat endpoint: {self._chat_url}")
+                
+                # One keep-alive pool shared by all workers, sized so none waits for a connection
+                self._http = requests.Session()
+                self._http.headers.update(self._chat_headers)
+                adapter = HTTPAdapter(pool_connections=max(1, len(self.ollama_base_urls)),
+                                      pool_maxsize=max(self.concurrency, self.ollama_parallel))
+                self._http.mount("http://", adapter)
+                self._http.mount("https://", adapter)
             
         except Exception as e:
             logger.error(f"Failed to initialize AutoGen agents: {e}")
             raise RuntimeError(f"Agent initialization failed: {e}")
 
-    def generate_documentation_for_file(self, file_path: str) -> Dict[str, Any]:
+    def _create_agents(self) -> Tuple[Any, Any]:
+        """Create an assistant/user proxy agent pair from the configured LLM."""
+        import autogen
+        
+        # Create an Assistant Agent with the configured LLM
+        assistant = autogen.AssistantAgent(
+            name="code_documentation_agent",
+            llm_config=self._llm_config,
+            system_message=SYSTEM_PROMPT
+        )
+        
+        # Create a user proxy agent for managing interactions - DISABLE DOCKER
+        user_proxy = autogen.UserProxyAgent(
+            name="user_proxy",
+            human_input_mode="NEVER",
+            max_consecutive_auto_reply=0,
+            # Disable Docker for code execution
+            code_execution_config={"use_docker": False}
+        )
+        return assistant, user_proxy
+
+    def _get_agents(self) -> Tuple[Any, Any]:
+        """Return this thread's agent pair, creating it on first use."""
+        agents = getattr(self._local, "agents", None)
+        if agents is None:
+            agents = self._local.agents = self._create_agents()
+        return agents
+
+    def close(self) -> None:
+        """Close pooled HTTP connections; the session reconnects if used again."""
+        http = getattr(self, "_http", None)
+        if http is not None:
+            http.close()
+
+    def _chat(self, prompt: str) -> str:
         """
-        Generate documentation for a single code file.
+        Send a documentation prompt to the model and return its reply.
         
         Args:
-            file_path: Path to the code file
+            prompt: User prompt to send along with the system prompt
             
         Returns:
-            Dictionary containing documentation information
+            Text content of the model's reply
         """
-        rel_path = os.path.relpath(file_path, self.directory)
-        logger.info(f"Processing file: {rel_path}")
+        if self.use_autogen:
+            # Use this thread's Assistant Agent to generate documentation through chat
+            assistant, user_proxy = self._get_agents()
+            user_proxy.initiate_chat(
+                assistant,
+                message=prompt
+            )
+            
+            # Extract the response from the last message in the conversation
+            return assistant.last_message()["content"]
         
-        try:
-            # Read file content
-            with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
-                code_content = f.read()
+        payload = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt},
+            ],
+        }
+        
+        if self.provider == "ollama":
+            payload["stream"] = True
+            payload["options"] = {"temperature": 0.7}
             
-            file_size = len(code_content.encode('utf-8'))
-            self.stats["total_bytes_processed"] += file_size
+            # Try each endpoint at most once, starting from the next one in round-robin order
+            last_error = None
+            for endpoint in self._endpoint_order():
+                try:
+                    with endpoint["semaphore"]:
+                        return self._stream_ollama(endpoint["url"], payload)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    last_error = e
+                except requests.HTTPError as e:
+                    if e.response is None or e.response.status_code < 500:
+                        raise
+                    last_error = e
+                endpoint["down_until"] = time.monotonic() + self.endpoint_cooldown
+                logger.warning(f"Ollama endpoint {endpoint['url']} failed, trying the next one: {last_error}")
+            raise last_error
+        
+        payload["stream"] = False
+        payload["temperature"] = 0.7
+        resp = self._http.post(self._chat_url, json=payload, timeout=self.timeout)
+        resp.raise_for_status()
+        return resp.json()["choices"][0]["message"]["content"]
+
+    def _endpoint_order(self) -> List[Dict[str, Any]]:
+        """
+        Order the Ollama endpoints for one request.
+        
+        Returns:
+            Endpoints starting from the next round-robin position, healthy ones first
+        """
+        start = next(self._endpoint_counter) % len(self._endpoints)
+        ordered = self._endpoints[start:] + self._endpoints[:start]
+        now = time.monotonic()
+        return ([e for e in ordered if e["down_until"] <= now] +
+                [e for e in ordered if e["down_until"] > now])
+
+    def _stream_ollama(self, url: str, payload: Dict[str, Any]) -> str:
+        """
+        Post a chat request to an Ollama endpoint and join the streamed reply.
+        
+        Args:
+            url: Ollama chat endpoint
+            payload: Chat request body with streaming enabled
             
-            # Get file extension and language
-            _, ext = os.path.splitext(file_path)
-            language = self.extensions.get(ext.lower(), "Unknown")
+        Returns:
+            Text content of the model's reply
+        """
+        # Streaming makes the timeout apply between chunks rather than to the whole generation
+        parts = []
+        with self._http.post(url, json=payload, timeout=self.timeout, stream=True) as resp:
+            resp.raise_for_status()
+            for line in resp.iter_lines():
+                if not line:
+                    continue
+                chunk = _json_loads(line)
+                if "error" in chunk:
+                    raise RuntimeError(f"Ollama error: {chunk['error']}")
+                parts.append(chunk.get("message", {}).get("content", ""))
+                if chunk.get("done"):
+                    break
+        return "".join(parts)
+
+    def _cache_path(self, prompt: str) -> str:
+        """
+        Get the response cache file for a prompt.
+        
+        Args:
+            prompt: Documentation prompt sent to the model
+            
+        Returns:
+            Path of the cache file keyed by provider, model and prompt
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{self.provider}|{self.model}|".encode('utf-8'))
+        digest.update(prompt.encode('utf-8', errors='replace'))
+        return os.path.join(self.cache_dir, f"{digest.hexdigest()}.txt")
+
+    def _load_cached_response(self, cache_path: str) -> Optional[str]:
+        """Return the cached model response at cache_path, or None if there is none."""
+        try:
+            with open(cache_path, 'rb') as f:
+                return f.read().decode('utf-8')
+        except (OSError, UnicodeDecodeError):
+            return None
+
+    def _store_cached_response(self, cache_path: str, response: str) -> None:
+        """Atomically write a model response to the cache."""
+        tmp_path = f"{cache_path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(response.encode('utf-8', errors='replace'))
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.warning(f"Could not write documentation cache: {e}")
+
+    def _documentation_prompt(self, code_content: str, rel_path: str, language: str, part: str = "") -> str:
+        """
+        Build the prompt asking the model to document some code.
+        
+        Args:
+            code_content: Code to document
+            rel_path: Path of the file relative to the scanned directory
+            language: Programming language of the file
+            part: Optional label such as " (part 2 of 5)" for chunked files
             
-            # Create documentation prompt
-            documentation_prompt = f"""
+        Returns:
+            Documentation prompt
+        """
+        return f"""
             Please generate documentation for the following {language} code file:
-            File: {rel_path}
+            File: {rel_path}{part}
             
             ```{language.lower()}
             {code_content}
@@ -391,15 +880,102 @@ class CodeDocumentationGenerator:
             
             Format the output as {self.output_format.upper()}.
             """
+
+    def _cached_chat(self, prompt: str) -> str:
+        """
+        Send a prompt to the model unless its response is already cached.
+        
+        Args:
+            prompt: Prompt to send
             
-            # Use Assistant Agent to generate documentation through chat
-            self.user_proxy.initiate_chat(
-                self.ollama_agent,
-                message=documentation_prompt
-            )
+        Returns:
+            Model response
+        """
+        # Reuse a cached response when this exact prompt was already answered by this model
+        cache_path = self._cache_path(prompt) if self.use_cache else None
+        response = self._load_cached_response(cache_path) if cache_path else None
+        
+        if response is None:
+            response = self._chat(prompt)
             
-            # Extract the response from the last message in the conversation
-            response = self.ollama_agent.last_message()["content"]
+            if cache_path:
+                self._store_cached_response(cache_path, response)
+        elif self.verbose:
+            logger.info(f"Using cached response: {os.path.basename(cache_path)}")
+        
+        return response
+
+    def _document_in_chunks(self, code_content: str, rel_path: str, language: str) -> str:
+        """
+        Document a file larger than max_file_size by splitting it into chunks.
+        
+        The chunks are documented concurrently and the partial documents are then
+        merged by one more request. Every request goes through the response cache,
+        so an interrupted run resumes chunk by chunk.
+        
+        Args:
+            code_content: Full file content
+            rel_path: Path of the file relative to the scanned directory
+            language: Programming language of the file
+            
+        Returns:
+            Model response documenting the whole file
+        """
+        chunks = _chunk_code(code_content, self.max_file_size)
+        total = len(chunks)
+        logger.info(f"Documenting {rel_path} in {total} chunks")
+        
+        prompts = [
+            self._documentation_prompt(chunk, rel_path, language, f" (part {i} of {total})")
+            for i, chunk in enumerate(chunks, 1)
+        ]
+        with ThreadPoolExecutor(max_workers=max(1, min(self.concurrency, total))) as executor:
+            partials = list(executor.map(self._cached_chat, prompts))
+        
+        sections = "\n\n".join(f"## Part {i}\n\n{partial}" for i, partial in enumerate(partials, 1))
+        merge_prompt = f"""
+            The {language} file {rel_path} was too large to document at once, so it was
+            documented in {total} consecutive parts. Combine the partial documentation below
+            into one coherent document for the whole file, removing repetition.
+            
+            {sections}
+            
+            Format the output as {self.output_format.upper()}.
+            """
+        return self._cached_chat(merge_prompt)
+
+    def generate_documentation_for_file(self, file_path: str) -> Dict[str, Any]:
+        """
+        Generate documentation for a single code file.
+        
+        Args:
+            file_path: Path to the code file
+            
+        Returns:
+            Dictionary containing documentation information
+        """
+        rel_path = os.path.relpath(file_path, self.directory)
+        logger.info(f"Processing file: {rel_path}")
+        
+        try:
+            # Read file content
+            code_content = _read_text(file_path)
+            
+            # Reuse the size recorded during the scan instead of re-encoding the content
+            file_size = self._file_sizes.get(file_path)
+            if file_size is None:
+                file_size = os.path.getsize(file_path)
+            with self._stats_lock:
+                self.stats["total_bytes_processed"] += file_size
+            
+            # Get file extension and language
+            language = self._ext_lang.get(os.path.splitext(file_path)[1].lower(), "Unknown")
+            
+            if file_size > self.max_file_size:
+                # Too large for one prompt: document it piece by piece, then merge
+                response = self._document_in_chunks(code_content, rel_path, language)
+            else:
+                response = self._cached_chat(self._documentation_prompt(code_content, rel_path, language))
             
             # Process and format the response
             documentation = self._format_documentation(
@@ -408,28 +984,35 @@ class CodeDocumentationGenerator:
                 language=language
             )
             
-            self.stats["total_files_processed"] += 1
+            with self._stats_lock:
+                self.stats["total_files_processed"] += 1
             
             return {
                 "file_path": rel_path,
                 "language": language,
                 "size_bytes": file_size,
-                "documentation": documentation
+                "documentation": documentation,
+                "raw_documentation": response
             }
             
         except Exception as e:
             logger.error(f"Error generating documentation for {rel_path}: {e}")
-            self.stats["errors"].append({
-                "file": rel_path,
-                "error": str(e),
-                "type": type(e).__name__
-            })
+            self._record_error(rel_path, str(e), type(e).__name__)
             return {
                 "file_path": rel_path,
                 "error": str(e),
                 "documentation": f"# Documentation Generation Failed\n\nError: {str(e)}"
             }
 
+    def _get_markdown(self) -> Any:
+        """Return this thread's reusable Markdown converter, or None if markdown isn't installed."""
+        if self._markdown is None:
+            return None
+        md = getattr(self._local, "markdown", None)
+        if md is None:
+            md = self._local.markdown = self._markdown.Markdown()
+        return md
+
     def _format_documentation(self, raw_doc: str, file_path: str, language: str) -> str:
         """
         Format the raw documentation based on the specified output format.
@@ -442,74 +1025,72 @@ class CodeDocumentationGenerator:
         Returns:
             Formatted documentation string
         """
-        # Extract the actual documentation content, removing any markdown code blocks if present
-        content = raw_doc
+        # The formatter for the output format is chosen once in __init__
+        return self._formatter(raw_doc, file_path, language)
+
+    def _format_markdown(self, content: str, file_path: str, language: str) -> str:
+        """Format documentation as markdown with a file info footer."""
+        # Ensure proper markdown formatting
+        if not content.startswith("# "):
+            content = f"# Documentation: {file_path}\n\n{content}"
+            
+        # Add file info
+        return content + MARKDOWN_FOOTER_TEMPLATE.format_map({
+            "file_path": file_path,
+            "language": language,
+            "generated": self._run_timestamp,
+        })
+
+    def _format_html(self, content: str, file_path: str, language: str) -> str:
+        """Format documentation as a standalone HTML page."""
+        # Convert markdown to HTML if needed
+        md = self._get_markdown()
+        if md is None:
+            return f"<h1>Documentation: {file_path}</h1>\n<pre>{content}</pre>"
         
-        # Check if output already has the right format
-        if self.output_format.lower() == "markdown":
-            # Ensure proper markdown formatting
-            if not content.startswith("# "):
-                content = f"# Documentation: {file_path}\n\n{content}"
-                
-            # Add file info
-            content = f"{content}\n\n---\n**File**: `{file_path}`  \n**Language**: {language}  \n**Generated**: {time.strftime('%Y-%m-%d %H:%M:%S')}"
-                
-        elif self.output_format.lower() == "html":
-            # Convert markdown to HTML if needed
-            try:
-                import markdown
-                html_content = markdown.markdown(content)
-                
-                content = f"""<!DOCTYPE html>
-                <html>
-                <head>
-                    <title>Documentation: {file_path}</title>
-                    <meta charset="utf-8">
-                    <style>
-                        body {{ font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, Helvetica, Arial, sans-serif; line-height: 1.6; padding: 20px; max-width: 900px; margin: 0 auto; color: #333; }}
-                        pre {{ background-color: #f5f5f5; padding: 10px; border-radius: 5px; overflow-x: auto; }}
-                        code {{ font-family: "SFMono-Regular", Consolas, "Liberation Mono", Menlo, monospace; }}
-                        h1, h2, h3 {{ color: #222; }}
-                        .file-info {{ font-size: 0.9em; color: #555; border-top: 1px solid #eee; margin-top: 30px; padding-top: 10px; }}
-                    </style>
-                </head>
-                <body>
-                    <h1>Documentation: {os.path.basename(file_path)}</h1>
-                    {html_content}
-                    <div class="file-info">
-                        <p><strong>File:</strong> {file_path}<br>
-                        <strong>Language:</strong> {language}<br>
-                        <strong>Generated:</strong> {time.strftime('%Y-%m-%d %H:%M:%S')}</p>
-                    </div>
-                </body>
-                </html>
-                """
-            except ImportError:
-                logger.warning("markdown package not found, outputting raw content")
-                content = f"<h1>Documentation: {file_path}</h1>\n<pre>{content}</pre>"
-                
-        elif self.output_format.lower() == "json":
-            # Format as JSON
-            doc_data = {
+        return HTML_DOC_TEMPLATE.format_map({
+            "file_path": file_path,
+            "name": os.path.basename(file_path),
+            "html_content": md.reset().convert(content),
+            "language": language,
+            "generated": self._run_timestamp,
+        })
+
+    def _format_json(self, content: str, file_path: str, language: str) -> str:
+        """Format documentation as a JSON document."""
+        doc_data = {
+            "file_path": file_path,
+            "language": language,
+            "generated_at": self._run_timestamp,
+            "content": content
+        }
+        
+        try:
+            return _json_dumps(doc_data, indent=True)
+        except Exception as e:
+            logger.error(f"Error formatting JSON: {e}")
+            return json.dumps({
                 "file_path": file_path,
                 "language": language,
-                "generated_at": time.strftime('%Y-%m-%d %H:%M:%S'),
-                "content": content
-            }
-            
-            try:
-                content = json.dumps(doc_data, indent=2)
-            except Exception as e:
-                logger.error(f"Error formatting JSON: {e}")
-                content = json.dumps({
-                    "file_path": file_path,
-                    "language": language,
-                    "error": str(e),
-                    "raw_content": str(content)
-                })
-                
+                "error": str(e),
+                "raw_content": str(content)
+            })
+
+    def _format_text(self, content: str, file_path: str, language: str) -> str:
+        """Leave documentation unformatted for unrecognised output formats."""
         return content
 
+    def _make_output_dirs(self, rel_dirs) -> None:
+        """
+        Create output subdirectories that haven't been created yet.
+        
+        Args:
+            rel_dirs: Directories relative to the output directory
+        """
+        for rel_dir in set(rel_dirs) - self._created_dirs:
+            os.makedirs(os.path.join(self.output_dir, rel_dir), exist_ok=True)
+            self._created_dirs.add(rel_dir)
+
     def save_documentation(self, doc_data: Dict[str, Any]) -> str:
         """
         Save the documentation to a file.
@@ -526,36 +1107,26 @@ class CodeDocumentationGenerator:
         # Create directory structure mirroring the original
         rel_dir = os.path.dirname(file_path)
         output_path = os.path.join(self.output_dir, rel_dir)
-        os.makedirs(output_path, exist_ok=True)
+        if rel_dir not in self._created_dirs:
+            self._make_output_dirs([rel_dir])
         
         # Determine output file name and extension
         base_name = os.path.basename(file_path)
         name_without_ext = os.path.splitext(base_name)[0]
         
-        if self.output_format.lower() == "markdown":
-            output_file = f"{name_without_ext}.md"
-        elif self.output_format.lower() == "html":
-            output_file = f"{name_without_ext}.html"
-        elif self.output_format.lower() == "json":
-            output_file = f"{name_without_ext}.json"
-        else:
-            output_file = f"{name_without_ext}.txt"
-            
+        output_file = f"{name_without_ext}{self._out_ext}"
         output_path = os.path.join(output_path, output_file)
         
         # Write the documentation to file
         try:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            _write_text(output_path, content)
+            with self._stats_lock:
+                self._written_paths.append(os.path.relpath(output_path, self.output_dir))
             logger.info(f"Documentation saved to: {output_path}")
             return output_path
         except Exception as e:
             logger.error(f"Error saving documentation: {e}")
-            self.stats["errors"].append({
-                "file": file_path,
-                "error": str(e),
-                "type": "save_error"
-            })
+            self._record_error(file_path, str(e), "save_error")
             return None
 
     def generate_index(self) -> str:
@@ -572,84 +1143,71 @@ class CodeDocumentationGenerator:
         self.stats["duration"] = self.stats["end_time"] - self.stats["start_time"]
         
         # Format based on output type
-        if self.output_format.lower() == "markdown":
-            content = "# Code Documentation Index\n\n"
-            content += f"Generated on: {time.strftime('%Y-%m-%d %H:%M:%S')}\n\n"
-            
-            # Add statistics
-            content += "## Statistics\n\n"
-            content += f"- Total files processed: {self.stats['total_files_processed']}\n"
-            content += f"- Total files skipped: {self.stats['total_files_skipped']}\n"
-            content += f"- Total code size: {format_size(self.stats['total_bytes_processed'])}\n"
-            content += f"- Processing time: {self.stats['duration']:.2f} seconds\n\n"
-            
-            # Add language breakdown
-            content += "## Language Breakdown\n\n"
-            for lang, count in self.stats["language_counts"].items():
-                content += f"- {lang}: {count} files\n"
-            
-            content += "\n## Documentation Files\n\n"
-            
-            # Walk through the output directory and add links
-            doc_files = []
-            for root, _, files in os.walk(self.output_dir):
-                for file in files:
-                    if file != "index.md" and file.endswith(f".{self.output_format.lower()}"):
-                        rel_path = os.path.relpath(os.path.join(root, file), self.output_dir)
-                        doc_files.append(rel_path)
-            
-            # Sort files
-            doc_files.sort()
+        if self._fmt == "markdown":
+            # Collect the pieces and join once; repeated += copies the whole string each time
+            parts = [
+                "# Code Documentation Index\n\n",
+                f"Generated on: {time.strftime('%Y-%m-%d %H:%M:%S')}\n\n",
+                
+                # Add statistics
+                "## Statistics\n\n",
+                f"- Total files processed: {self.stats['total_files_processed']}\n",
+                f"- Total files skipped: {self.stats['total_files_skipped']}\n",
+                f"- Total code size: {format_size(self.stats['total_bytes_processed'])}\n",
+                f"- Processing time: {self.stats['duration']:.2f} seconds\n\n",
+                
+                # Add language breakdown
+                "## Language Breakdown\n\n",
+            ]
+            parts.extend(f"- {lang}: {count} files\n" for lang, count in self.stats["language_counts"].items())
+            
+            parts.append("\n## Documentation Files\n\n")
+            
+            # Link every documentation file written during this run
+            doc_files = sorted(self._written_paths)
             
             # Add links
             for doc_file in doc_files:
                 file_name = os.path.basename(doc_file)
                 dir_name = os.path.dirname(doc_file)
                 if dir_name:
-                    content += f"- [{file_name}](./{doc_file}) (in {dir_name})\n"
+                    parts.append(f"- [{file_name}](./{doc_file}) (in {dir_name})\n")
                 else:
-                    content += f"- [{file_name}](./{doc_file})\n"
+                    parts.append(f"- [{file_name}](./{doc_file})\n")
             
             # Add error summary if any
             if self.stats["errors"]:
-                content += "\n## Errors\n\n"
-                for error in self.stats["errors"]:
-                    content += f"- {error['file']}: {error['error']}\n"
+                parts.append("\n## Errors\n\n")
+                if self.stats["error_count"] > len(self.stats["errors"]):
+                    parts.append(f"Showing the last {len(self.stats['errors'])} of {self.stats['error_count']} errors.\n\n")
+                parts.extend(f"- {error['file']}: {error['error']}\n" for error in self.stats["errors"])
+            
+            content = "".join(parts)
             
             index_path = os.path.join(self.output_dir, "index.md")
             
-        elif self.output_format.lower() == "html":
+        elif self._fmt == "html":
             # Create HTML index
-            doc_files = []
-            for root, _, files in os.walk(self.output_dir):
-                for file in files:
-                    if file != "index.html" and file.endswith(".html"):
-                        rel_path = os.path.relpath(os.path.join(root, file), self.output_dir)
-                        doc_files.append(rel_path)
-            
-            # Sort files
-            doc_files.sort()
+            doc_files = sorted(self._written_paths)
             
             # Build file list HTML
-            file_list = ""
+            file_items = []
             for doc_file in doc_files:
                 file_name = os.path.basename(doc_file)
                 dir_name = os.path.dirname(doc_file)
                 if dir_name:
-                    file_list += f'<li><a href="./{doc_file}">{file_name}</a> <small>(in {dir_name})</small></li>\n'
+                    file_items.append(f'<li><a href="./{doc_file}">{file_name}</a> <small>(in {dir_name})</small></li>\n')
                 else:
-                    file_list += f'<li><a href="./{doc_file}">{file_name}</a></li>\n'
+                    file_items.append(f'<li><a href="./{doc_file}">{file_name}</a></li>\n')
+            file_list = "".join(file_items)
             
             # Build language stats HTML
-            lang_stats = ""
-            for lang, count in self.stats["language_counts"].items():
-                lang_stats += f'<li>{lang}: {count} files</li>\n'
+            lang_stats = "".join(f'<li>{lang}: {count} files</li>\n'
+                                 for lang, count in self.stats["language_counts"].items())
             
             # Build error list HTML
-            error_list = ""
-            if self.stats["errors"]:
-                for error in self.stats["errors"]:
-                    error_list += f'<li>{error["file"]}: {error["error"]}</li>\n'
+            error_list = "".join(f'<li>{error["file"]}: {error["error"]}</li>\n'
+                                 for error in self.stats["errors"])
             
             content = f"""<!DOCTYPE html>
             <html>
@@ -707,17 +1265,9 @@ class CodeDocumentationGenerator:
             
             index_path = os.path.join(self.output_dir, "index.html")
             
-        elif self.output_format.lower() == "json":
+        elif self._fmt == "json":
             # Create JSON index
-            doc_files = []
-            for root, _, files in os.walk(self.output_dir):
-                for file in files:
-                    if file != "index.json" and file.endswith(".json"):
-                        rel_path = os.path.relpath(os.path.join(root, file), self.output_dir)
-                        doc_files.append(rel_path)
-            
-            # Sort files
-            doc_files.sort()
+            doc_files = sorted(self._written_paths)
             
             # Create index data
             index_data = {
@@ -730,22 +1280,100 @@ class CodeDocumentationGenerator:
                     "language_counts": self.stats["language_counts"]
                 },
                 "documentation_files": doc_files,
-                "errors": self.stats["errors"] if self.stats["errors"] else []
+                "error_count": self.stats["error_count"],
+                "errors": list(self.stats["errors"])
             }
             
-            content = json.dumps(index_data, indent=2)
+            content = _json_dumps(index_data, indent=True)
             index_path = os.path.join(self.output_dir, "index.json")
         
         # Write the index file
         try:
-            with open(index_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            _write_text(index_path, content)
             logger.info(f"Index file saved to: {index_path}")
             return index_path
         except Exception as e:
             logger.error(f"Error saving index file: {e}")
             return None
 
+    def _content_key(self, file_path: str) -> Union[bytes, str]:
+        """
+        Get a key that is equal for files with identical content.
+        
+        Args:
+            file_path: Path to the code file
+            
+        Returns:
+            Digest of the file content, or the path itself if the file can't be read
+        """
+        try:
+            with open(file_path, 'rb', buffering=0) as f:
+                return hashlib.blake2b(f.read(), digest_size=16).digest()
+        except OSError:
+            # Unreadable files get their own key so the error is reported for them
+            return file_path
+
+    def _document_duplicate(self, doc_data: Dict[str, Any], file_path: str) -> Dict[str, Any]:
+        """
+        Reuse the documentation generated for one file for an identical copy.
+        
+        Args:
+            doc_data: Documentation data of the file that was sent to the model
+            file_path: Path to the identical copy
+            
+        Returns:
+            Documentation data for the copy, with its own path in the headers
+        """
+        rel_path = os.path.relpath(file_path, self.directory)
+        
+        if "error" in doc_data:
+            self._record_error(rel_path, doc_data["error"], "duplicate_error")
+            return dict(doc_data, file_path=rel_path)
+        
+        language = self._ext_lang.get(os.path.splitext(file_path)[1].lower(), "Unknown")
+        with self._stats_lock:
+            self.stats["total_files_processed"] += 1
+            self.stats["total_bytes_processed"] += doc_data["size_bytes"]
+        
+        return {
+            "file_path": rel_path,
+            "language": language,
+            "size_bytes": doc_data["size_bytes"],
+            "documentation": self._format_documentation(
+                doc_data["raw_documentation"],
+                file_path=rel_path,
+                language=language
+            ),
+            "raw_documentation": doc_data["raw_documentation"]
+        }
+
+    def _process_file(self, file_path: str, index: int) -> Optional[Dict[str, Any]]:
+        """
+        Generate and save documentation for one file, recording any failure.
+        
+        Args:
+            file_path: Path to the code file
+            index: 1-based position of the file in this run
+            
+        Returns:
+            Documentation data, or None if processing failed
+        """
+        rel_path = os.path.relpath(file_path, self.directory)
+        logger.info(f"Processing file {index}: {rel_path}")
+        
+        try:
+            # Generate documentation
+            doc_data = self.generate_documentation_for_file(file_path)
+            
+            # Save documentation
+            self.save_documentation(doc_data)
+            return doc_data
+            
+        except Exception as e:
+            logger.error(f"Failed to process {rel_path}: {e}")
+            self._record_error(rel_path, str(e), "process_error")
+            return None
+
     def run(self):
         """
         Run the documentation generation process.
@@ -755,12 +1383,34 @@ class CodeDocumentationGenerator:
         """
         logger.info(f"Starting documentation generation for {self.directory}")
         start_time = time.time()
+        self._run_timestamp = time.strftime('%Y-%m-%d %H:%M:%S')
         
         try:
-            # Scan directory for code files
-            code_files = self.scan_directory()
+            # Document files as the scan finds them, in parallel when concurrency allows;
+            # each distinct file content is sent to the model only once
+            groups = {}
+            submitted = []
+            total_found = 0
+            executor = ThreadPoolExecutor(max_workers=self.concurrency) if self.concurrency > 1 else None
+            try:
+                for file_path in self.iter_code_files():
+                    total_found += 1
+                    key = self._content_key(file_path)
+                    if key in groups:
+                        groups[key].append(file_path)
+                        continue
+                    group = groups[key] = [file_path]
+                    
+                    index = len(groups)
+                    if executor is not None:
+                        submitted.append((group, executor.submit(self._process_file, file_path, index)))
+                    else:
+                        submitted.append((group, self._process_file(file_path, index)))
+            finally:
+                if executor is not None:
+                    executor.shutdown(wait=True)
             
-            if not code_files:
+            if not total_found:
                 logger.warning("No code files found to process")
                 return {
                     "status": "completed",
@@ -768,26 +1418,17 @@ class CodeDocumentationGenerator:
                     "stats": self.stats
                 }
             
-            # Process each file
-            total_files = len(code_files)
-            for i, file_path in enumerate(code_files):
-                rel_path = os.path.relpath(file_path, self.directory)
-                logger.info(f"Processing file {i+1}/{total_files}: {rel_path}")
-                
-                try:
-                    # Generate documentation
-                    doc_data = self.generate_documentation_for_file(file_path)
-                    
-                    # Save documentation
-                    self.save_documentation(doc_data)
-                    
-                except Exception as e:
-                    logger.error(f"Failed to process {rel_path}: {e}")
-                    self.stats["errors"].append({
-                        "file": rel_path,
-                        "error": str(e),
-                        "type": "process_error"
-                    })
+            logger.info(f"Found {total_found} code files ({total_found - len(groups)} duplicates)")
+            if self.stats["total_files_skipped"]:
+                logger.info(f"Skipped {self.stats['total_files_skipped']} files")
+            
+            # Identical copies share the documentation generated for the first one
+            for group, outcome in submitted:
+                doc_data = outcome.result() if executor is not None else outcome
+                if doc_data is None:
+                    continue
+                for duplicate in group[1:]:
+                    self.save_documentation(self._document_duplicate(doc_data, duplicate))
             
             # Generate index file
             index_path = self.generate_index()
@@ -810,3 +1451,6 @@ class CodeDocumentationGenerator:
                 "message": f"Documentation generation failed: {e}",
                 "stats": self.stats
             }
+        
+        finally:
+            self.close()
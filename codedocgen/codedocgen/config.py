@@ -4,12 +4,13 @@ Handles loading, saving, and interactive configuration with questionary.
 """
 
 import os
+import sys
+import copy
 import json
 import logging
-import questionary
+from functools import lru_cache
 from pathlib import Path
-import yaml
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(message)s')
@@ -23,7 +24,13 @@ DEFAULT_CONFIG = {
     "openai_api_key": "",
     "output_format": "markdown",
     "max_file_size": 500 * 1024,  # 500KB
+    "chunk_large_files": False,  # Document larger files in max_file_size chunks
     "timeout": 60,
+    "concurrency": 1,  # Files documented in parallel
+    "ollama_urls": [],  # Extra Ollama servers to round-robin across (overrides port)
+    "ollama_parallel": None,  # Concurrent Ollama requests (defaults to OLLAMA_NUM_PARALLEL)
+    "use_cache": True,  # Reuse cached model responses for unchanged files
+    "use_autogen": False,  # Route requests through AutoGen agents
     "exclude_dirs": [
         ".git", ".github", "__pycache__", "node_modules", "venv", "env",
         "dist", "build", ".idea", ".vscode", ".pytest_cache"
@@ -41,12 +48,63 @@ DEFAULT_CONFIG = {
 
 # Config file location
 CONFIG_DIR = os.path.expanduser("~/.config/codedocgen")
-CONFIG_FILE = os.path.join(CONFIG_DIR, "config.yaml")
+CONFIG_FILE = os.path.join(CONFIG_DIR, "config.json")
+# YAML config written by earlier versions, converted to JSON on first load
+LEGACY_CONFIG_FILE = os.path.join(CONFIG_DIR, "config.yaml")
+
+# Config keys stored as JSON lists but handed out as frozensets
+_EXCLUDE_KEYS = ("exclude_dirs", "exclude_files")
+
+# (mtime_ns, size, config) of the last config file read or written by this process,
+# so the file is only parsed again when it changes on disk
+_config_cache: Optional[Tuple[int, int, Dict[str, Any]]] = None
+
+
+# colorama's (Fore, Style), imported and initialized on first use
+_colorama = None
+
+
+def _get_colorama():
+    """
+    Import and initialize colorama once per process.
+    
+    Returns:
+        Tuple of colorama's (Fore, Style)
+    """
+    global _colorama
+    if _colorama is None:
+        from colorama import Fore, Style, init
+        init()  # Initialize colorama
+        _colorama = (Fore, Style)
+    return _colorama
+
+
+@lru_cache(maxsize=None)
+def _get_box_header(title: str) -> str:
+    """
+    Build the colored box printed above a configuration screen.
+    
+    Args:
+        title: Text shown inside the box
+        
+    Returns:
+        The three box lines, ready to print
+    """
+    Fore, Style = _get_colorama()
+    return "\n".join([
+        f"\n{Fore.CYAN}╔══════════════════════════════════════════════╗{Style.RESET_ALL}",
+        f"{Fore.CYAN}║ {Fore.WHITE}{title:<45}{Fore.CYAN}║{Style.RESET_ALL}",
+        f"{Fore.CYAN}╚══════════════════════════════════════════════╝{Style.RESET_ALL}\n",
+    ])
 
 
 def ensure_config_dir() -> None:
     """Ensure the configuration directory exists."""
-    os.makedirs(CONFIG_DIR, exist_ok=True)
+    # Catching FileExistsError skips the isdir() re-check that exist_ok=True performs
+    try:
+        os.makedirs(CONFIG_DIR)
+    except FileExistsError:
+        pass
 
 
 def load_config() -> Dict[str, Any]:
@@ -57,27 +115,105 @@ def load_config() -> Dict[str, Any]:
     Returns:
         Dict containing configuration values
     """
-    ensure_config_dir()
+    global _config_cache
+    
+    # One stat tells whether the cached config is still current
+    try:
+        st = os.stat(CONFIG_FILE)
+    except FileNotFoundError:
+        st = None
+    
+    if st is not None and _config_cache is not None and _config_cache[:2] == (st.st_mtime_ns, st.st_size):
+        # Callers modify the returned dict, so hand out copies of the cached one
+        return copy.deepcopy(_config_cache[2])
     
-    if not os.path.exists(CONFIG_FILE):
-        # Create default config file
-        save_config(DEFAULT_CONFIG)
-        return DEFAULT_CONFIG.copy()
+    if st is None:
+        config = _migrate_legacy_config()
+        if config is None:
+            # Create default config file
+            save_config(DEFAULT_CONFIG)
+            return _with_defaults(copy.deepcopy(DEFAULT_CONFIG))
+        return _with_defaults(config)
     
     try:
         with open(CONFIG_FILE, 'r') as f:
-            config = yaml.safe_load(f)
+            config = json.load(f)
             
-        # Merge with defaults to ensure all keys exist
-        for key, value in DEFAULT_CONFIG.items():
-            if key not in config:
-                config[key] = value
-                
+        config = _with_defaults(config)
+        _config_cache = (st.st_mtime_ns, st.st_size, copy.deepcopy(config))
         return config
     except Exception as e:
         logger.error(f"Error loading config file: {e}")
         logger.info("Using default configuration")
-        return DEFAULT_CONFIG.copy()
+        return _with_defaults(copy.deepcopy(DEFAULT_CONFIG))
+
+
+def _with_defaults(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Fill in any keys missing from a loaded configuration with their defaults."""
+    # Merge with defaults to ensure all keys exist
+    for key, value in DEFAULT_CONFIG.items():
+        if key not in config:
+            config[key] = value
+    
+    # Exclude patterns are only ever tested for membership, so hash them once here
+    for key in _EXCLUDE_KEYS:
+        config[key] = frozenset(config[key] or ())
+            
+    return config
+
+
+def _json_default(value: Any) -> Any:
+    """Serialize the exclude frozensets back to the sorted lists stored on disk."""
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _migrate_legacy_config() -> Optional[Dict[str, Any]]:
+    """
+    Convert a YAML config file from an earlier version to JSON.
+    
+    If the YAML file exists but cannot be read, nothing is written, so the user's
+    settings stay in place for a later migration and the defaults are used for now.
+    
+    Returns:
+        The migrated configuration, the defaults if migration failed, or None if
+        there was nothing to migrate
+    """
+    try:
+        f = open(LEGACY_CONFIG_FILE, 'r')
+    except FileNotFoundError:
+        return None
+    
+    try:
+        # PyYAML is only needed for this one-time conversion
+        import yaml
+        try:
+            from yaml import CSafeLoader as SafeLoader
+        except ImportError:
+            from yaml import SafeLoader
+        
+        with f:
+            config = yaml.load(f, Loader=SafeLoader) or {}
+    except ImportError:
+        f.close()
+        logger.error(
+            f"Found legacy config file {LEGACY_CONFIG_FILE}, but PyYAML is needed to migrate it. "
+            f"Run 'pip install pyyaml' and start codedocgen again to convert it to {CONFIG_FILE}. "
+            "Using the default configuration until then."
+        )
+        return copy.deepcopy(DEFAULT_CONFIG)
+    except Exception as e:
+        f.close()
+        logger.error(f"Error migrating legacy config file {LEGACY_CONFIG_FILE}: {e}")
+        logger.error(f"Fix or remove {LEGACY_CONFIG_FILE} to continue; using the default configuration until then.")
+        return copy.deepcopy(DEFAULT_CONFIG)
+    
+    save_config(config)
+    if os.path.exists(CONFIG_FILE):
+        os.remove(LEGACY_CONFIG_FILE)
+        logger.info(f"Migrated {LEGACY_CONFIG_FILE} to {CONFIG_FILE}")
+    return config
 
 
 def save_config(config: Dict[str, Any]) -> None:
@@ -87,11 +223,36 @@ def save_config(config: Dict[str, Any]) -> None:
     Args:
         config: Dictionary containing configuration values
     """
-    ensure_config_dir()
+    global _config_cache
     
     try:
-        with open(CONFIG_FILE, 'w') as f:
-            yaml.dump(config, f, default_flow_style=False)
+        # Write to a temporary file and swap it in, so an interrupted save never
+        # leaves a truncated config behind
+        tmp_path = f"{CONFIG_FILE}.{os.getpid()}.tmp"
+        
+        # Only create the config directory when the first open shows it is missing
+        try:
+            f = open(tmp_path, 'w')
+        except FileNotFoundError:
+            ensure_config_dir()
+            f = open(tmp_path, 'w')
+        
+        try:
+            with f:
+                json.dump(config, f, indent=2, default=_json_default)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, CONFIG_FILE)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        
+        # Keep the in-process copy in step with the file
+        st = os.stat(CONFIG_FILE)
+        _config_cache = (st.st_mtime_ns, st.st_size, _with_defaults(copy.deepcopy(config)))
             
         logger.info(f"Configuration saved to {CONFIG_FILE}")
     except Exception as e:
@@ -108,15 +269,15 @@ def interactive_configuration(existing_config: Optional[Dict[str, Any]] = None)
     Returns:
         Updated configuration dictionary
     """
-    from colorama import Fore, Style, init
-    init()  # Initialize colorama
+    # Prompting is the only thing that needs questionary, so a plain `run` never imports it
+    import questionary
+    
+    Fore, Style = _get_colorama()
     
     # Load existing config or use defaults
     config = existing_config or load_config()
     
-    print(f"\n{Fore.CYAN}╔══════════════════════════════════════════════╗{Style.RESET_ALL}")
-    print(f"{Fore.CYAN}║ {Fore.WHITE}CodeDocGen Configuration{Fore.CYAN}                    ║{Style.RESET_ALL}")
-    print(f"{Fore.CYAN}╚══════════════════════════════════════════════╝{Style.RESET_ALL}\n")
+    print(_get_box_header("CodeDocGen Configuration"))
     
     print(f"{Fore.YELLOW}Configure how the documentation generator works.{Style.RESET_ALL}")
     print(f"{Fore.YELLOW}Press Enter to keep the current value.{Style.RESET_ALL}\n")
@@ -262,6 +423,12 @@ def interactive_configuration(existing_config: Optional[Dict[str, Any]] = None)
     return config
 
 
+def invalidate_config_cache() -> None:
+    """Forget the cached configuration so the next load re-reads the config file."""
+    global _config_cache
+    _config_cache = None
+
+
 def get_config() -> Dict[str, Any]:
     """
     Get the current configuration.
@@ -285,31 +452,37 @@ def get_config_file_path() -> str:
 
 def print_current_config() -> None:
     """Print the current configuration values."""
-    from colorama import Fore, Style, init
-    init()  # Initialize colorama
+    Fore, Style = _get_colorama()
     
     config = load_config()
     
-    print(f"\n{Fore.CYAN}╔══════════════════════════════════════════════╗{Style.RESET_ALL}")
-    print(f"{Fore.CYAN}║ {Fore.WHITE}Current CodeDocGen Configuration{Fore.CYAN}             ║{Style.RESET_ALL}")
-    print(f"{Fore.CYAN}╚══════════════════════════════════════════════╝{Style.RESET_ALL}\n")
+    def field(label: str, value: Any) -> str:
+        return f"{Fore.WHITE}{label}:{Style.RESET_ALL} {value}"
     
-    print(f"{Fore.WHITE}Provider:{Style.RESET_ALL} {config.get('provider', 'ollama')}")
-    print(f"{Fore.WHITE}Model:{Style.RESET_ALL} {config.get('model', 'mistral')}")
+    # Collect every line first and emit them with one write instead of a print() each
+    lines = [
+        _get_box_header("Current CodeDocGen Configuration"),
+        field("Provider", config.get('provider', 'ollama')),
+        field("Model", config.get('model', 'mistral')),
+    ]
     
     if config.get('provider') == 'ollama':
-        print(f"{Fore.WHITE}Ollama Port:{Style.RESET_ALL} {config.get('port', 11434)}")
+        lines.append(field("Ollama Port", config.get('port', 11434)))
     elif config.get('provider') == 'openai':
         api_key = config.get('openai_api_key', '')
         masked_key = "********" + api_key[-4:] if api_key and len(api_key) > 4 else "Not Set"
-        print(f"{Fore.WHITE}OpenAI API Key:{Style.RESET_ALL} {masked_key}")
-    
-    print(f"{Fore.WHITE}Output Format:{Style.RESET_ALL} {config.get('output_format', 'markdown')}")
-    print(f"{Fore.WHITE}Max File Size:{Style.RESET_ALL} {config.get('max_file_size', 500 * 1024) // 1024}KB")
-    print(f"{Fore.WHITE}API Timeout:{Style.RESET_ALL} {config.get('timeout', 60)}s")
-    print(f"{Fore.WHITE}Excluded Directories:{Style.RESET_ALL} {', '.join(config.get('exclude_dirs', []))}")
-    print(f"{Fore.WHITE}Excluded Files:{Style.RESET_ALL} {', '.join(config.get('exclude_files', []))}")
-    print(f"\n{Fore.WHITE}Config File Location:{Style.RESET_ALL} {CONFIG_FILE}")
+        lines.append(field("OpenAI API Key", masked_key))
+    
+    lines += [
+        field("Output Format", config.get('output_format', 'markdown')),
+        field("Max File Size", f"{config.get('max_file_size', 500 * 1024) // 1024}KB"),
+        field("API Timeout", f"{config.get('timeout', 60)}s"),
+        field("Excluded Directories", ', '.join(sorted(config.get('exclude_dirs', [])))),
+        field("Excluded Files", ', '.join(sorted(config.get('exclude_files', [])))),
+        "\n" + field("Config File Location", CONFIG_FILE),
+    ]
+    
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 if __name__ == "__main__":
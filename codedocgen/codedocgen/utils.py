@@ -7,7 +7,20 @@ import sys
 import subprocess
 import shutil
 import platform
-from typing import Dict, List, Optional, Tuple, Union
+import importlib.util
+import json
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+# orjson is optional; when installed it parses the Ollama API responses faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# The host OS cannot change while the process runs, so look it up once
+_SYSTEM = platform.system().lower()
 
 
 def format_size(size_bytes: int) -> str:
@@ -28,6 +41,41 @@ def format_size(size_bytes: int) -> str:
         return f"{size_bytes / (1024 * 1024):.1f} MB"
 
 
+@lru_cache(maxsize=None)
+def _get_session():
+    """
+    Get the HTTP session shared by the Ollama API helpers.
+    
+    Reusing one session keeps the connection to the local Ollama server alive
+    across the availability check, model listing and validation calls.
+    
+    Returns:
+        requests.Session with a small connection pool
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+    return session
+
+
+def _parse_json(response) -> Any:
+    """
+    Parse the JSON body of an HTTP response.
+    
+    Args:
+        response: requests.Response to decode
+        
+    Returns:
+        The decoded JSON value
+    """
+    # Decode the raw bytes directly, skipping requests' charset detection
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return json.loads(response.content)
+
+
 def check_ollama_availability(port: int = 11434) -> Tuple[bool, str]:
     """
     Check if Ollama is available and running.
@@ -41,9 +89,9 @@ def check_ollama_availability(port: int = 11434) -> Tuple[bool, str]:
     import requests
     
     try:
-        response = requests.get(f"http://localhost:{port}/api/version", timeout=5)
+        response = _get_session().get(f"http://localhost:{port}/api/version", timeout=5)
         if response.status_code == 200:
-            version_info = response.json()
+            version_info = _parse_json(response)
             return True, f"Ollama is running (version: {version_info.get('version', 'unknown')})"
         else:
             return False, f"Ollama API returned status code {response.status_code}"
@@ -53,28 +101,38 @@ def check_ollama_availability(port: int = 11434) -> Tuple[bool, str]:
         return False, f"Error checking Ollama: {str(e)}"
 
 
-def list_available_ollama_models(port: int = 11434) -> List[str]:
+def _fetch_ollama_models(port: int = 11434) -> Optional[List[str]]:
     """
-    List available Ollama models.
+    Fetch the names of the models installed in Ollama.
     
     Args:
         port: Ollama API port
         
     Returns:
-        List of available model names
+        List of model names, or None if the Ollama API could not be queried
     """
-    import requests
-    
     try:
-        response = requests.get(f"http://localhost:{port}/api/tags", timeout=5)
+        response = _get_session().get(f"http://localhost:{port}/api/tags", timeout=5)
         if response.status_code == 200:
-            models_data = response.json()
-            models = [model["name"] for model in models_data.get("models", [])]
-            return models
+            models_data = _parse_json(response)
+            return [model["name"] for model in models_data.get("models", [])]
         else:
-            return []
+            return None
     except Exception:
-        return []
+        return None
+
+
+def list_available_ollama_models(port: int = 11434) -> List[str]:
+    """
+    List available Ollama models.
+    
+    Args:
+        port: Ollama API port
+        
+    Returns:
+        List of available model names
+    """
+    return _fetch_ollama_models(port) or []
 
 
 def check_dependencies() -> Dict[str, bool]:
@@ -86,17 +144,17 @@ def check_dependencies() -> Dict[str, bool]:
     """
     status = {}
     
-    # Check Python packages
-    for package in ["autogen", "requests", "questionary", "colorama", "pyyaml"]:
-        try:
-            __import__(package)
-            status[package] = True
-        except ImportError:
-            status[package] = False
-    
-    # Check Ollama
-    ollama_available, _ = check_ollama_availability()
-    status["ollama"] = ollama_available
+    # Probe Ollama in the background so the network wait overlaps the package checks
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        ollama_check = executor.submit(check_ollama_availability)
+        
+        # Check Python packages; find_spec locates them without running their imports
+        for package in ["autogen", "requests", "questionary", "colorama"]:
+            status[package] = importlib.util.find_spec(package) is not None
+        
+        # Check Ollama
+        ollama_available, _ = ollama_check.result()
+        status["ollama"] = ollama_available
     
     return status
 
@@ -121,10 +179,13 @@ def install_missing_dependencies(missing_deps: List[str]) -> bool:
         return False
 
 
+@lru_cache(maxsize=1)
 def get_platform_info() -> Dict[str, str]:
     """
     Get information about the current platform.
     
+    The result is computed once and shared between callers, so treat it as read-only.
+    
     Returns:
         Dictionary with platform information
     """
@@ -144,7 +205,7 @@ def get_ollama_install_instructions() -> str:
     Returns:
         Installation instructions as a string
     """
-    system = platform.system().lower()
+    system = _SYSTEM
     
     if system == "darwin":  # macOS
         return (
@@ -182,26 +243,13 @@ def validate_ollama_model(model_name: str, port: int = 11434) -> Tuple[bool, str
     Returns:
         Tuple of (is_valid, message)
     """
-    import requests
-    import json
+    # A single /api/tags request both lists the models and shows the API is reachable
+    available_models = _fetch_ollama_models(port)
+    if available_models is None:
+        return False, f"Could not validate model '{model_name}'"
     
-    # First check if model is already available
-    try:
-        available_models = list_available_ollama_models(port)
-        if model_name in available_models:
-            return True, f"Model '{model_name}' is available"
-            
-        # If not available, check if it can be pulled
-        # This is just a check, not actually pulling the model
-        response = requests.get(
-            f"http://localhost:{port}/api/tags", 
-            timeout=5
-        )
-        
-        if response.status_code == 200:
-            return True, f"Model '{model_name}' can be used with Ollama"
-        else:
-            return False, f"Could not validate model '{model_name}'"
-            
-    except Exception as e:
-        return False, f"Error validating model: {str(e)}"
+    if model_name in available_models:
+        return True, f"Model '{model_name}' is available"
+    
+    # Not installed yet, but Ollama is up and can pull it on first use
+    return True, f"Model '{model_name}' can be used with Ollama"
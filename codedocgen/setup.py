@@ -24,9 +24,12 @@ setup(
         "pyautogen>=0.2.0",
         "requests>=2.25.0",
         "questionary>=1.10.0",
-        "pyyaml>=6.0",
         "colorama>=0.4.4",
     ],
+    extras_require={
+        # Faster JSON for the response cache, JSON output and index
+        "fast": ["orjson>=3.9"],
+    },
     entry_points={
         "console_scripts": [
             "codedocgen=codedocgen.cli:main",